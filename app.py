@@ -1,22 +1,39 @@
 from __future__ import annotations
 
+import functools
 import io
+import math
 import re
 import base64
 import os
+import time
+import uuid
 from datetime import date, datetime, timedelta
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, asdict, astuple, field
 from typing import Dict, List, Tuple
+from xml.sax.saxutils import escape
 
 import streamlit as st
 import streamlit.components.v1 as components
 from docx import Document
 from pypdf import PdfReader
+
+try:
+    import pymupdf as fitz  # considerably faster PDF text extraction than pypdf
+except ImportError:
+    fitz = None
+from reportlab import rl_config
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import LETTER
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import Frame, Paragraph
+
+# Skip reportlab's per-call shape validation on drawing primitives.
+rl_config.shapeChecking = 0
 
 
 @dataclass
@@ -93,78 +110,130 @@ WAREHOUSE_NATIVE_OTHER_PRODUCTS = [
 USAGE_BASED_REQUIRED_PRODUCTS = ["Warehouse Native", "Platform Fee"]
 SUPPORT_TIERS = ["Premium", "Standard", "Community"]
 
+# Radio options for the Warehouse Native experimentation picker, frozen once
+# instead of re-building ["None"] + ... on every rerun.
+WN_EXPERIMENTATION_CHOICES = ("None", *WAREHOUSE_NATIVE_EXPERIMENTATION_OPTIONS)
 
-def normalize_text(text: str) -> str:
-    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+OPPORTUNITY_OPTIONS = ["New Logo", "Renewal", "Expansion/Upsell"]
+PAYMENT_METHOD_OPTIONS = ["Bank Transfer", "AWS Billing", "GCP Billing", "Azure Billing"]
+BILLING_FREQUENCY_OPTIONS = ["Annual", "Semi-Annual", "Quarterly"]
+PAYMENT_TERM_OPTIONS = ["Net 30", "Net 45", "Net 60", "Net 90"]
+TERMS_OPTIONS = ["Online", "MSA"]
 
+# value -> position maps for widget defaults; .get(value, 0) replaces the
+# `options.index(v) if v in options else 0` double scan on every rerun.
+WAREHOUSE_TYPES_IDX = {v: i for i, v in enumerate(WAREHOUSE_TYPES)}
+SUPPORT_TIERS_IDX = {v: i for i, v in enumerate(SUPPORT_TIERS)}
+WN_EXPERIMENTATION_IDX = {v: i for i, v in enumerate(WN_EXPERIMENTATION_CHOICES)}
+OPPORTUNITY_IDX = {v: i for i, v in enumerate(OPPORTUNITY_OPTIONS)}
+PAYMENT_METHOD_IDX = {v: i for i, v in enumerate(PAYMENT_METHOD_OPTIONS)}
+BILLING_FREQUENCY_IDX = {v: i for i, v in enumerate(BILLING_FREQUENCY_OPTIONS)}
+PAYMENT_TERM_IDX = {v: i for i, v in enumerate(PAYMENT_TERM_OPTIONS)}
+TERMS_OPTIONS_IDX = {v: i for i, v in enumerate(TERMS_OPTIONS)}
+
+
+# Fold whitespace around line breaks (including \r\n) and collapse blank lines
+# in two C-level passes instead of a Python loop per line.
+_WS_AROUND_NL = re.compile(r"[ \t\r\f\v]*\n[ \t\r\f\v]*")
+_MULTI_NL = re.compile(r"\n+")
 
-def extract_text_from_upload(uploaded_file) -> str:
-    file_name = uploaded_file.name.lower()
 
+def normalize_text(text: str) -> str:
+    return _MULTI_NL.sub("\n", _WS_AROUND_NL.sub("\n", text)).strip()
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _extract_text_from_bytes(data: bytes, file_name: str) -> str:
     if file_name.endswith(".txt"):
-        return uploaded_file.read().decode("utf-8", errors="ignore")
+        return data.decode("utf-8", errors="ignore")
 
     if file_name.endswith(".pdf"):
-        reader = PdfReader(uploaded_file)
+        if fitz is not None:
+            doc = fitz.open(stream=data, filetype="pdf")
+            return "\n".join(page.get_text("text") for page in doc)
+        reader = PdfReader(io.BytesIO(data))
         pages = [page.extract_text() or "" for page in reader.pages]
         return "\n".join(pages)
 
     if file_name.endswith(".docx"):
-        doc = Document(uploaded_file)
+        doc = Document(io.BytesIO(data))
         paragraphs = [p.text for p in doc.paragraphs]
         return "\n".join(paragraphs)
 
     return ""
 
 
-def find_field(text: str, labels: List[str]) -> str:
-    for label in labels:
-        pattern = rf"(?im)^\s*{re.escape(label)}\s*[:\-]\s*(.+)$"
-        match = re.search(pattern, text)
-        if match:
-            return match.group(1).strip()
-    return ""
+def extract_text_from_upload(uploaded_file) -> str:
+    # Streamlit hashes the raw bytes, so reruns with the same upload skip
+    # the pypdf/python-docx parse entirely.
+    return _extract_text_from_bytes(uploaded_file.read(), uploaded_file.name.lower())
+
+
+# Label lists per extracted field, ordered from most to least specific.
+FIELD_LABELS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("account_name", ("customer", "account", "account name", "customer name")),
+    ("primary_contact_name", ("primary contact", "contact", "contact name")),
+    ("primary_contact_email", ("contact email", "customer contact", "email")),
+    ("billing_email", ("billing email", "invoice email")),
+    ("shipping_address", ("shipping address", "ship to", "address")),
+    ("billing_address", ("billing address", "bill to")),
+    ("start_date", ("start date", "subscription start")),
+    (
+        "subscription_term_months",
+        ("subscription term (months)", "subscription term", "term months", "term"),
+    ),
+    ("billing_frequency", ("billing frequency", "frequency")),
+    ("payment_terms", ("payment terms", "terms")),
+    ("payment_method", ("payment method",)),
+    ("billing_id", ("billing id", "aws billing id", "gcp billing id", "azure billing id")),
+    ("po_number", ("po", "po number", "purchase order")),
+    ("opportunity_type", ("opportunity type", "deal type", "deal label")),
+    (
+        "addendum_effective_date",
+        ("addendum effective date", "effective date", "upsell effective date"),
+    ),
+    ("terms_type", ("terms", "terms type", "agreement type")),
+    ("msa_execution_date", ("msa execution date", "msa executed on", "msa date")),
+    ("expiration_date", ("expiration date", "quote expiration", "expires on")),
+    ("usage_terms", ("usage terms", "terms details", "notes")),
+]
+
+# A label can feed several fields (e.g. "terms"), so map each one to every
+# (field, priority) pair it can satisfy. Priority mirrors label-list order.
+_LABEL_TARGETS: Dict[str, List[Tuple[str, int]]] = {}
+for _field, _labels in FIELD_LABELS:
+    for _priority, _label in enumerate(_labels):
+        _LABEL_TARGETS.setdefault(_label, []).append((_field, _priority))
+
+# Longer labels first so the alternation prefers "billing email" over "email".
+MASTER_FIELD_RE = re.compile(
+    r"(?im)^\s*("
+    + "|".join(re.escape(label) for label in sorted(_LABEL_TARGETS, key=len, reverse=True))
+    + r")\s*[:\-]\s*(.+)$"
+)
 
 
 def extract_order_fields(text: str) -> OrderData:
     cleaned = normalize_text(text)
-    return OrderData(
-        account_name=find_field(cleaned, ["customer", "account", "account name", "customer name"]),
-        primary_contact_name=find_field(cleaned, ["primary contact", "contact", "contact name"]),
-        primary_contact_email=find_field(cleaned, ["contact email", "customer contact", "email"]),
-        billing_email=find_field(cleaned, ["billing email", "invoice email"]),
-        shipping_address=find_field(cleaned, ["shipping address", "ship to", "address"]),
-        billing_address=find_field(cleaned, ["billing address", "bill to"]),
-        start_date=find_field(cleaned, ["start date", "subscription start"]),
-        subscription_term_months=_to_int(
-            find_field(
-                cleaned,
-                ["subscription term (months)", "subscription term", "term months", "term"],
-            )
-        ),
-        billing_frequency=find_field(cleaned, ["billing frequency", "frequency"]),
-        payment_terms=find_field(cleaned, ["payment terms", "terms"]),
-        payment_method=find_field(cleaned, ["payment method"]),
-        billing_id=find_field(cleaned, ["billing id", "aws billing id", "gcp billing id", "azure billing id"]),
-        po_number=find_field(cleaned, ["po", "po number", "purchase order"]),
-        opportunity_type=find_field(cleaned, ["opportunity type", "deal type", "deal label"]),
-        addendum_effective_date=find_field(
-            cleaned,
-            ["addendum effective date", "effective date", "upsell effective date"],
-        ),
-        terms_type=find_field(cleaned, ["terms", "terms type", "agreement type"]),
-        msa_execution_date=find_field(
-            cleaned,
-            ["msa execution date", "msa executed on", "msa date"],
-        ),
-        expiration_date=find_field(cleaned, ["expiration date", "quote expiration", "expires on"]),
-        usage_terms=find_field(cleaned, ["usage terms", "terms details", "notes"]),
-    )
+    values: Dict[str, str] = {field_name: "" for field_name, _ in FIELD_LABELS}
+    best_priority: Dict[str, int] = {}
+    for match in MASTER_FIELD_RE.finditer(cleaned):
+        label = match.group(1).lower()
+        for field_name, priority in _LABEL_TARGETS.get(label, ()):
+            if priority < best_priority.get(field_name, len(_LABEL_TARGETS)):
+                values[field_name] = match.group(2).strip()
+                best_priority[field_name] = priority
+    term_months = _to_int(values.pop("subscription_term_months", ""))
+    return OrderData(subscription_term_months=term_months, **values)
+
+
+# Strips currency formatting in one C-level pass instead of chained replaces.
+_MONEY_TRANS = str.maketrans("", "", "$,")
 
 
 def safe_money(value: str) -> float:
     try:
-        return float(str(value).replace("$", "").replace(",", "").strip() or 0)
+        return float(str(value).translate(_MONEY_TRANS).strip() or 0)
     except ValueError:
         return 0.0
 
@@ -177,15 +246,22 @@ def _to_int(value: str, default: int = 12) -> int:
         return default
 
 
-def parse_date(value: str) -> date:
-    if not value:
-        today = date.today()
-        return date(today.year, today.month, 1)
+@functools.lru_cache(maxsize=512)
+def _parse_date_value(value: str) -> date | None:
     for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%Y/%m/%d"):
         try:
             return datetime.strptime(value, fmt).date()
         except ValueError:
             continue
+    return None
+
+
+def parse_date(value: str) -> date:
+    # strptime is slow and the same strings recur on every rerun, so cache
+    # successful parses; the today fallback stays uncached on purpose.
+    parsed = _parse_date_value(value) if value else None
+    if parsed is not None:
+        return parsed
     today = date.today()
     return date(today.year, today.month, 1)
 
@@ -201,6 +277,7 @@ def add_months(d: date, months: int) -> date:
     return date(year, month, 1)
 
 
+@functools.lru_cache(maxsize=64)
 def compute_end_date(start: date, term_months: int) -> date:
     return add_months(first_of_month(start), max(1, term_months)) - timedelta(days=1)
 
@@ -233,6 +310,12 @@ def product_options_by_warehouse(warehouse_type: str) -> List[str]:
     return CLOUD_PRODUCTS
 
 
+@functools.cache
+def _product_options_set(warehouse_type: str) -> frozenset:
+    # Frozen membership view of the option list for O(1) filtering.
+    return frozenset(product_options_by_warehouse(warehouse_type))
+
+
 def default_unit_for_service(service: str) -> str:
     if service == "Experimentation":
         return "Billable Events"
@@ -241,17 +324,22 @@ def default_unit_for_service(service: str) -> str:
     return "N/A"
 
 
-def is_experimentation_service(service: str, warehouse_type: str = "") -> bool:
-    cloud_only = {"Experimentation"}
-    warehouse_native_only = {
+_EXP_CLOUD = frozenset({"Experimentation"})
+_EXP_WAREHOUSE_NATIVE = frozenset(
+    {
         "Experimentation: Analysis Only",
         "Experimentation: Analysis + Assignment",
     }
+)
+_EXP_ALL = _EXP_CLOUD | _EXP_WAREHOUSE_NATIVE
+
+
+def is_experimentation_service(service: str, warehouse_type: str = "") -> bool:
     if warehouse_type == "Cloud":
-        return service in cloud_only
+        return service in _EXP_CLOUD
     if warehouse_type == "Warehouse Native":
-        return service in warehouse_native_only
-    return service in (cloud_only | warehouse_native_only)
+        return service in _EXP_WAREHOUSE_NATIVE
+    return service in _EXP_ALL
 
 
 def default_usage_for_service(service: str) -> str:
@@ -265,7 +353,7 @@ def default_usage_for_service(service: str) -> str:
 
 
 def parse_numeric_value(value: str):
-    cleaned = str(value).replace("$", "").replace(",", "").strip()
+    cleaned = str(value).translate(_MONEY_TRANS).strip()
     if cleaned == "":
         return None
     try:
@@ -275,6 +363,12 @@ def parse_numeric_value(value: str):
 
 
 def format_usage_commitment_value(value) -> str:
+    # Fast path for the constant defaults so they skip str()/strip and the
+    # whole-number parse below.
+    if value is None or value == "":
+        return ""
+    if value == "N/A":
+        return "N/A"
     raw = str(value).strip()
     if raw == "" or raw.upper() == "N/A":
         return "N/A" if raw.upper() == "N/A" else ""
@@ -297,43 +391,53 @@ def build_services_rows(
     rows: List[Dict[str, str]] = []
     for product in selected_products:
         service_name = f"{support_tier} Support" if product == "Support" else product
-        existing = existing_by_service.get(service_name, {})
-        rows.append(
-            {
-                "subscription_period": "",
-                "service": service_name,
-                "annual_usage_commitment": format_usage_commitment_value(
-                    existing.get("annual_usage_commitment", default_usage_for_service(service_name))
-                ),
-                "unit": str(existing.get("unit", default_unit_for_service(service_name))),
-                "annual_service_fee": normalize_fee_value(existing.get("annual_service_fee", 0.0)),
-            }
-        )
+        existing = existing_by_service.get(service_name)
+        if existing is not None:
+            # Values already went through _normalize_row above; reuse them
+            # without re-running the usage/fee formatters.
+            rows.append(
+                {
+                    "subscription_period": "",
+                    "service": service_name,
+                    "annual_usage_commitment": existing["annual_usage_commitment"],
+                    "unit": existing["unit"],
+                    "annual_service_fee": existing["annual_service_fee"],
+                }
+            )
+        else:
+            rows.append(
+                {
+                    "subscription_period": "",
+                    "service": service_name,
+                    "annual_usage_commitment": default_usage_for_service(service_name),
+                    "unit": default_unit_for_service(service_name),
+                    "annual_service_fee": 0.0,
+                }
+            )
     return rows
 
 
+def _normalize_row(row: Dict[str, str]) -> Dict[str, str]:
+    return {
+        "subscription_period": str(
+            row.get("subscription_period", row.get("Subscription Period", ""))
+        ),
+        "service": str(row.get("service", row.get("Service", ""))),
+        "annual_usage_commitment": format_usage_commitment_value(
+            row.get(
+                "annual_usage_commitment",
+                row.get("Annual Usage Commitment", ""),
+            )
+        ),
+        "unit": str(row.get("unit", row.get("Unit", ""))),
+        "annual_service_fee": normalize_fee_value(
+            row.get("annual_service_fee", row.get("Annual Service Fee", ""))
+        ),
+    }
+
+
 def normalize_service_rows(rows: List[Dict[str, str]]) -> List[Dict[str, str]]:
-    normalized: List[Dict[str, str]] = []
-    for row in rows:
-        normalized.append(
-            {
-                "subscription_period": str(
-                    row.get("subscription_period", row.get("Subscription Period", ""))
-                ),
-                "service": str(row.get("service", row.get("Service", ""))),
-                "annual_usage_commitment": format_usage_commitment_value(
-                    row.get(
-                        "annual_usage_commitment",
-                        row.get("Annual Usage Commitment", ""),
-                    )
-                ),
-                "unit": str(row.get("unit", row.get("Unit", ""))),
-                "annual_service_fee": normalize_fee_value(
-                    row.get("annual_service_fee", row.get("Annual Service Fee", ""))
-                ),
-            }
-        )
-    return normalized
+    return [_normalize_row(row) for row in rows]
 
 
 def rows_from_editor(value) -> List[Dict[str, str]]:
@@ -348,25 +452,37 @@ def rows_from_editor(value) -> List[Dict[str, str]]:
     return normalize_service_rows([])
 
 
-def sort_rows_by_fee_desc(rows: List[Dict[str, str]]) -> List[Dict[str, str]]:
+def sort_rows_by_fee_desc(
+    rows: List[Dict[str, str]],
+) -> Tuple[List[Dict[str, str]], bool]:
+    """Sort rows by descending fee (Support last) and report reordering.
+
+    The changed flag lets callers skip a rerun when the committed editor
+    state is already in fee order.
+    """
     normalized = normalize_service_rows(rows)
     # Keep support as the final row; sort all other rows by descending fee.
-    return sorted(
+    ordered = sorted(
         normalized,
         key=lambda row: (
             str(row.get("service", "")).strip().endswith("Support"),
-            -normalize_fee_value(row.get("annual_service_fee", 0.0)),
+            # Rows are normalized above, so the fee is already a float.
+            -row.get("annual_service_fee", 0.0),
         ),
     )
+    changed = any(a is not b for a, b in zip(ordered, normalized))
+    return ordered, changed
 
 
 def is_whole_number(value: str) -> bool:
     cleaned = str(value).replace(",", "").strip()
-    return bool(re.fullmatch(r"\d+", cleaned))
+    # isdecimal, not isdigit: the latter passes superscript/circled digits
+    # that parse_whole_number (and the baseline \d+ regex) reject.
+    return bool(cleaned) and cleaned.isdecimal()
 
 
 def is_numeric_amount(value: str) -> bool:
-    cleaned = str(value).replace("$", "").replace(",", "").strip()
+    cleaned = str(value).translate(_MONEY_TRANS).strip()
     if cleaned == "":
         return False
     try:
@@ -377,11 +493,15 @@ def is_numeric_amount(value: str) -> bool:
 
 
 def normalize_fee_value(value):
-    if value is None:
-        return 0.0
+    # Fees coming off normalized rows are already floats; check that first
+    # and keep the string-cleaning path for raw editor input only.
+    if type(value) is float:
+        return value
     if isinstance(value, (int, float)):
         return float(value)
-    cleaned = str(value).replace("$", "").replace(",", "").strip()
+    if value is None:
+        return 0.0
+    cleaned = str(value).translate(_MONEY_TRANS).strip()
     if cleaned == "":
         return 0.0
     try:
@@ -390,8 +510,12 @@ def normalize_fee_value(value):
         return 0.0
 
 
+def _format_fee_float(value: float) -> str:
+    return f"${value:,.2f}"
+
+
 def format_fee_display(value) -> str:
-    return f"${normalize_fee_value(value):,.2f}"
+    return _format_fee_float(normalize_fee_value(value))
 
 
 def validate_services_rows(rows: List[Dict[str, str]], warehouse_type: str) -> List[str]:
@@ -426,7 +550,11 @@ def validate_services_rows(rows: List[Dict[str, str]], warehouse_type: str) -> L
 
 def parse_whole_number(value: str) -> int:
     cleaned = str(value).replace(",", "").strip()
-    if not re.fullmatch(r"\d+", cleaned):
+    # int() also accepts signs and underscore separators that the digits-only
+    # check rejected; isdecimal matches exactly what int() parses (isdigit
+    # would pass superscripts like "²" that int() raises on) and keeps this
+    # consistent with is_whole_number.
+    if not cleaned.isdecimal():
         return 0
     return int(cleaned)
 
@@ -438,6 +566,7 @@ def find_row_by_service(rows: List[Dict[str, str]], service_name: str) -> Dict[s
     return {}
 
 
+@st.cache_data(max_entries=64)
 def compute_excess_usage_rate(rows: List[Dict[str, str]], warehouse_type: str) -> str:
     if warehouse_type == "Cloud":
         exp_row = find_row_by_service(rows, "Experimentation")
@@ -479,120 +608,129 @@ def compute_excess_usage_rate(rows: List[Dict[str, str]], warehouse_type: str) -
     return "N/A"
 
 
+# Support both possible labels the workflow has used.
+_WN_ASSIGNMENT_LABELS = frozenset(
+    {
+        "Experimentation: Analysis + Assignment",
+        "Warehouse Native: Experimentation (Analysis + Assignment)",
+    }
+)
+_WN_ANALYSIS_ONLY_LABELS = frozenset(
+    {"Experimentation: Analysis Only", "Warehouse Native: Analysis"}
+)
+
+# Usage-term boilerplate. Only the excess usage rate varies, so keep the
+# multi-kilobyte literals at module scope and format the taken branch only.
+_SESSION_REPLAY_TERM = (
+    "Customer will have access to 50,000 recorded user sessions on a rolling 30-day basis, for a total "
+    "of 600,000 during the Paid Subscription Term. New sessions above 50,000 in a 30-day window will not "
+    "be recorded or stored. Customer can control session recording frequency by adjusting sample rate."
+)
+
+_CLOUD_SHORT_FG_ONLY_TERM = (
+    "Customer may use up to 100,000,000,000 non-analytic Feature Gate and config checks through all "
+    "server and client-side SDKs during each subscription period."
+)
+
+_CLOUD_LONG_FG_PLUS_EXP_TEMPLATE = (
+    "Customer has access to the number of billable events specified in the table above during the "
+    "applicable subscription period (\"Annual Usage Commitment\"). Unused billable events expire at the "
+    "end of the applicable subscription period and cannot be rolled over to a future subscription period.\n\n"
+    "Statsig records a billable event when Customer's application uses Statsig SDKs or APIs to check "
+    "the value of an experiment, analytics-enabled gate, or layer. Statsig deduplicates exposure events "
+    "for identical users and features or experiments within each hour on a client-side SDK and within "
+    "each minute on a server-side SDK.\n\n"
+    "Statsig also records a billable event each time Customer logs an event to Statsig via Statsig SDKs, "
+    "ingests a metric, or computes a custom metric. Customer can add one event dimension for each logged "
+    "event, without incurring an additional billable event. For every additional dimension added, an extra "
+    "log event will be recorded.\n\n"
+    "Checks for experiments that result in no allocation (i.e., if the experiment hasn't commenced or has "
+    "concluded) or Feature Gates that are deactivated (i.e., fully launched or discarded without any rule "
+    "evaluation) do not generate billable events.\n\n"
+    "Customer may use up to 100,000,000,000 non-analytic Feature Gate and config checks through all server "
+    "and client-side SDKs during each subscription period.\n\n"
+    "If Customer exceeds the Annual Usage Commitment during the applicable subscription period, Customer "
+    "shall be invoiced monthly in arrears for any excess usage at a rate of {rate} per "
+    "1,000 billable events."
+)
+
+_WN_ANALYSIS_ASSIGNMENT_TEMPLATE = (
+    "If Customer has access to the number of experiments specified in the table above during the "
+    "applicable subscription period (\"Annual Usage Commitment\"). Unused experiments expire at the end "
+    "of the applicable subscription period and cannot be rolled over to a future subscription period.\n\n"
+    "Experiment is defined as an experiment or a feature rollout that results in metric lifts being "
+    "computed. Feature rollouts configured to not compute metric lifts are not counted as experiments. "
+    "The same experiment being restarted is not counted as a new experiment.\n\n"
+    "Customer may use up to 100,000,000,000 Feature Gate checks through all server and client-side SDKs. "
+    "Customers may also forward up to 100,000,000,000 exposures to their data warehouse using Statsig's SDKs.\n\n"
+    "If Customer exceeds the Annual Usage Commitment during the applicable subscription period, Customer "
+    "shall be invoiced monthly in arrears for any excess usage at a rate of {rate} per experiment."
+)
+
+_WN_ANALYSIS_ONLY_TEMPLATE = (
+    "Customer has access to the number of experiments specified in the table above during the applicable "
+    "subscription period (\"Annual Usage Commitment\"). Unused experiments expire at the end of the "
+    "applicable subscription period and cannot be rolled over to a future subscription period.\n\n"
+    "Experiment is defined as an experiment or a feature rollout that results in metric lifts being computed. "
+    "Feature rollouts configured to not compute metric lifts are not counted as experiments. The same "
+    "experiment being restarted is not counted as a new experiment.\n\n"
+    "If Customer exceeds the Annual Usage Commitment during the applicable subscription period, Customer "
+    "shall be invoiced monthly in arrears for any excess usage at a rate of {rate} per experiment."
+)
+
+
+@st.cache_data(max_entries=64)
 def build_usage_terms_for_products(
     warehouse_type: str,
-    selected_products: List[str],
+    selected_products: Tuple[str, ...],
     excess_usage_rate: str,
 ) -> str:
     excess_usage_rate_display = fmt_money(safe_money(excess_usage_rate))
-    has_feature_gates = "Feature Gates and SDKs" in selected_products
-    has_session_replay = "Session Replay" in selected_products
-    cloud_experimentation_set = {
-        "Experimentation",
-        "Experimentation: Analysis Only",
-        "Experimentation: Analysis + Assignment",
-    }
-    has_cloud_experimentation = any(p in selected_products for p in cloud_experimentation_set)
-    # Support both possible labels the workflow has used.
-    has_wn_analysis_assignment = any(
-        p in selected_products
-        for p in [
-            "Experimentation: Analysis + Assignment",
-            "Warehouse Native: Experimentation (Analysis + Assignment)",
-        ]
-    )
-    has_wn_analysis_only = any(
-        p in selected_products
-        for p in ["Experimentation: Analysis Only", "Warehouse Native: Analysis"]
-    )
-
-    session_replay_term = (
-        "Customer will have access to 50,000 recorded user sessions on a rolling 30-day basis, for a total "
-        "of 600,000 during the Paid Subscription Term. New sessions above 50,000 in a 30-day window will not "
-        "be recorded or stored. Customer can control session recording frequency by adjusting sample rate."
-    )
+    selected_set = frozenset(selected_products)
+    has_feature_gates = "Feature Gates and SDKs" in selected_set
+    has_session_replay = "Session Replay" in selected_set
+    has_cloud_experimentation = bool(selected_set & _EXP_ALL)
+    has_wn_analysis_assignment = bool(selected_set & _WN_ASSIGNMENT_LABELS)
+    has_wn_analysis_only = bool(selected_set & _WN_ANALYSIS_ONLY_LABELS)
 
     if warehouse_type == "Cloud":
-        cloud_short_fg_only = (
-            "Customer may use up to 100,000,000,000 non-analytic Feature Gate and config checks through all "
-            "server and client-side SDKs during each subscription period."
-        )
-        cloud_long_fg_plus_exp = (
-            "Customer has access to the number of billable events specified in the table above during the "
-            "applicable subscription period (\"Annual Usage Commitment\"). Unused billable events expire at the "
-            "end of the applicable subscription period and cannot be rolled over to a future subscription period.\n\n"
-            "Statsig records a billable event when Customer's application uses Statsig SDKs or APIs to check "
-            "the value of an experiment, analytics-enabled gate, or layer. Statsig deduplicates exposure events "
-            "for identical users and features or experiments within each hour on a client-side SDK and within "
-            "each minute on a server-side SDK.\n\n"
-            "Statsig also records a billable event each time Customer logs an event to Statsig via Statsig SDKs, "
-            "ingests a metric, or computes a custom metric. Customer can add one event dimension for each logged "
-            "event, without incurring an additional billable event. For every additional dimension added, an extra "
-            "log event will be recorded.\n\n"
-            "Checks for experiments that result in no allocation (i.e., if the experiment hasn't commenced or has "
-            "concluded) or Feature Gates that are deactivated (i.e., fully launched or discarded without any rule "
-            "evaluation) do not generate billable events.\n\n"
-            "Customer may use up to 100,000,000,000 non-analytic Feature Gate and config checks through all server "
-            "and client-side SDKs during each subscription period.\n\n"
-            "If Customer exceeds the Annual Usage Commitment during the applicable subscription period, Customer "
-            f"shall be invoiced monthly in arrears for any excess usage at a rate of {excess_usage_rate_display} per "
-            "1,000 billable events."
-        )
         base = ""
         if has_feature_gates and has_cloud_experimentation:
-            base = cloud_long_fg_plus_exp
+            base = _CLOUD_LONG_FG_PLUS_EXP_TEMPLATE.format(rate=excess_usage_rate_display)
         elif has_feature_gates and not has_cloud_experimentation:
-            base = cloud_short_fg_only
+            base = _CLOUD_SHORT_FG_ONLY_TERM
         if has_session_replay:
-            return f"{base}\n\n{session_replay_term}" if base else session_replay_term
+            return f"{base}\n\n{_SESSION_REPLAY_TERM}" if base else _SESSION_REPLAY_TERM
         return base
 
     if warehouse_type == "Warehouse Native":
-        wn_analysis_assignment_text = (
-            "If Customer has access to the number of experiments specified in the table above during the "
-            "applicable subscription period (\"Annual Usage Commitment\"). Unused experiments expire at the end "
-            "of the applicable subscription period and cannot be rolled over to a future subscription period.\n\n"
-            "Experiment is defined as an experiment or a feature rollout that results in metric lifts being "
-            "computed. Feature rollouts configured to not compute metric lifts are not counted as experiments. "
-            "The same experiment being restarted is not counted as a new experiment.\n\n"
-            "Customer may use up to 100,000,000,000 Feature Gate checks through all server and client-side SDKs. "
-            "Customers may also forward up to 100,000,000,000 exposures to their data warehouse using Statsig's SDKs.\n\n"
-            "If Customer exceeds the Annual Usage Commitment during the applicable subscription period, Customer "
-            f"shall be invoiced monthly in arrears for any excess usage at a rate of {excess_usage_rate_display} per experiment."
-        )
-        wn_analysis_only_text = (
-            "Customer has access to the number of experiments specified in the table above during the applicable "
-            "subscription period (\"Annual Usage Commitment\"). Unused experiments expire at the end of the "
-            "applicable subscription period and cannot be rolled over to a future subscription period.\n\n"
-            "Experiment is defined as an experiment or a feature rollout that results in metric lifts being computed. "
-            "Feature rollouts configured to not compute metric lifts are not counted as experiments. The same "
-            "experiment being restarted is not counted as a new experiment.\n\n"
-            "If Customer exceeds the Annual Usage Commitment during the applicable subscription period, Customer "
-            f"shall be invoiced monthly in arrears for any excess usage at a rate of {excess_usage_rate_display} per experiment."
-        )
         base = ""
         if has_wn_analysis_assignment:
-            base = wn_analysis_assignment_text
+            base = _WN_ANALYSIS_ASSIGNMENT_TEMPLATE.format(rate=excess_usage_rate_display)
         elif has_wn_analysis_only:
-            base = wn_analysis_only_text
+            base = _WN_ANALYSIS_ONLY_TEMPLATE.format(rate=excess_usage_rate_display)
         if has_session_replay:
-            return f"{base}\n\n{session_replay_term}" if base else session_replay_term
+            return f"{base}\n\n{_SESSION_REPLAY_TERM}" if base else _SESSION_REPLAY_TERM
         return base
 
     return ""
 
 
 def products_from_services_rows(rows: List[Dict[str, str]]) -> List[str]:
+    # Only the service name is needed here, so read it straight off the raw
+    # rows instead of paying for a full normalize_service_rows pass.
+    seen: set = set()
     products: List[str] = []
-    for row in normalize_service_rows(rows):
-        service = str(row.get("service", "")).strip()
+    for row in rows:
+        service = str(row.get("service", row.get("Service", ""))).strip()
         if not service:
             continue
         if service.endswith("Support"):
-            products.append("Support")
-            continue
-        products.append(service)
-    return list(dict.fromkeys(products))
+            service = "Support"
+        if service not in seen:
+            seen.add(service)
+            products.append(service)
+    return products
 
 
 def normalize_special_terms(selected: List[str]) -> List[str]:
@@ -603,70 +741,69 @@ def normalize_special_terms(selected: List[str]) -> List[str]:
     return list(dict.fromkeys(non_none))
 
 
+_MERGED_PREVIEW_CSS = """
+    <style>
+      .merged-preview table {
+        width: 100%;
+        border-collapse: collapse;
+        font-size: 0.9rem;
+      }
+      .merged-preview th, .merged-preview td {
+        border: 1px solid #b8b8b8;
+        padding: 8px;
+        text-align: center;
+      }
+      .merged-preview th {
+        background: #1f4675;
+        color: #ffffff;
+        font-weight: 700;
+      }
+      .merged-preview .total-row td {
+        font-weight: 700;
+      }
+    </style>
+    """
+
+
 def render_merged_table_preview(
     rows: List[Dict[str, str]],
-    column_spec: List[Tuple[str, str]],
+    column_spec: Tuple[Tuple[str, str], ...],
     period_text: str,
     total: str,
 ) -> None:
     row_count = max(1, len(rows))
-    first_key, first_label = column_spec[0]
     other_cols = column_spec[1:]
 
-    header_html = "".join(f"<th>{label}</th>" for _, label in column_spec)
-    body_rows = []
+    parts: List[str] = [
+        _MERGED_PREVIEW_CSS,
+        '<div class="merged-preview"><table><thead><tr>',
+    ]
+    for _, label in column_spec:
+        parts.append(f"<th>{label}</th>")
+    parts.append("</tr></thead><tbody>")
     for i in range(row_count):
         row = rows[i] if i < len(rows) else {}
-        cells = []
+        parts.append("<tr>")
         if i == 0:
-            cells.append(f"<td rowspan='{row_count}'>{period_text}</td>")
+            parts.append(f"<td rowspan='{row_count}'>{period_text}</td>")
         for key, _ in other_cols:
-            cells.append(f"<td>{row.get(key, '')}</td>")
-        body_rows.append(f"<tr>{''.join(cells)}</tr>")
+            parts.append(f"<td>{row.get(key, '')}</td>")
+        parts.append("</tr>")
 
     total_colspan = max(1, len(column_spec) - 1)
-    total_row = (
+    parts.append(
         f"<tr class='total-row'><td colspan='{total_colspan}'>Total:</td><td>{total}</td></tr>"
         if len(column_spec) > 1
         else f"<tr class='total-row'><td>{total}</td></tr>"
     )
-
-    html = f"""
-    <style>
-      .merged-preview table {{
-        width: 100%;
-        border-collapse: collapse;
-        font-size: 0.9rem;
-      }}
-      .merged-preview th, .merged-preview td {{
-        border: 1px solid #b8b8b8;
-        padding: 8px;
-        text-align: center;
-      }}
-      .merged-preview th {{
-        background: #1f4675;
-        color: #ffffff;
-        font-weight: 700;
-      }}
-      .merged-preview .total-row td {{
-        font-weight: 700;
-      }}
-    </style>
-    <div class="merged-preview">
-      <table>
-        <thead><tr>{header_html}</tr></thead>
-        <tbody>
-          {''.join(body_rows)}
-          {total_row}
-        </tbody>
-      </table>
-    </div>
-    """
-    st.markdown(html, unsafe_allow_html=True)
+    parts.append("</tbody></table></div>")
+    st.markdown("".join(parts), unsafe_allow_html=True)
 
 
+@functools.cache
 def resolve_pdf_fonts() -> Tuple[str, str]:
-    if "OpenSans" in pdfmetrics.getRegisteredFontNames() and "OpenSans-Bold" in pdfmetrics.getRegisteredFontNames():
+    registered = set(pdfmetrics.getRegisteredFontNames())
+    if {"OpenSans", "OpenSans-Bold"} <= registered:
         return "OpenSans", "OpenSans-Bold"
 
     font_candidates = [
@@ -691,6 +828,7 @@ def resolve_pdf_fonts() -> Tuple[str, str]:
     return "Helvetica", "Helvetica-Bold"
 
 
+@functools.cache
 def resolve_pdf_italic_font() -> str:
     if "OpenSans-Italic" in pdfmetrics.getRegisteredFontNames():
         return "OpenSans-Italic"
@@ -705,6 +843,14 @@ def resolve_pdf_italic_font() -> str:
     return "Helvetica-Oblique"
 
 
+@functools.lru_cache(maxsize=4)
+def _logo_reader(path: str) -> ImageReader:
+    # ImageReader keeps the decoded image, so repeated drawImage calls skip
+    # re-opening and re-decoding the file.
+    return ImageReader(path)
+
+
+@functools.cache
 def find_header_logo_path() -> str:
     for path in [
         "/Users/matti/Desktop/Statsig_Logo_Transparent_Black.png",
@@ -720,6 +866,7 @@ def find_header_logo_path() -> str:
     return ""
 
 
+@functools.cache
 def find_signature_logo_path() -> str:
     for path in [
         "/Users/matti/Desktop/Logo-min.png",
@@ -732,6 +879,72 @@ def find_signature_logo_path() -> str:
     return ""
 
 
+@st.cache_resource
+def _pdf_assets() -> Dict[str, object]:
+    """Fonts and header logo resolved once per process.
+
+    Font registration and image decode dominate cold PDF builds; every
+    render pulls from this shared bundle instead of re-resolving.
+    """
+    font_regular, font_bold = resolve_pdf_fonts()
+    header_logo_path = find_header_logo_path()
+    return {
+        "font_regular": font_regular,
+        "font_bold": font_bold,
+        "font_italic": resolve_pdf_italic_font(),
+        "header_logo": _logo_reader(header_logo_path) if header_logo_path else None,
+    }
+
+
+# Word tokens with trailing whitespace attached, for link-aware line wrapping.
+_WORD_WS = re.compile(r"\S+\s*")
+
+# Shared canvas colors, built once so repeated HexColor parsing (and the
+# identity check in _PdfState.set_fill) works across pages and sections.
+_BLACK = colors.black
+_WHITE = colors.white
+_GRAY = colors.HexColor("#aaaaaa")
+_BLUE = colors.HexColor("#1f4675")
+_LINK_BLUE = colors.HexColor("#194b7d")
+
+
+# Pre-wrapped boilerplate paragraphs for the Agreement section; the blank
+# entry is the gap between the two paragraphs.
+_AGREEMENT_PARAGRAPH_LINES: List[str] = [
+    "The pricing and terms in this Order Form are Statsig, LLC's Proprietary Information. All fees are in U.S. dollars and",
+    "exclude all taxes. Customer is responsible for all applicable taxes, including, but not limited to, U.S. sales,",
+    "withholding tax, GST, and VAT. Capitalized terms not defined in this Order Form have the meanings assigned in the MSA.",
+    "If a direct conflict exists between this Order Form and the MSA, the terms of this Order Form will control.",
+    "",
+    "The parties through their duly authorized representative agree to the terms of this Order Form, effective as of",
+    "last signature date.",
+]
+
+
+class _PdfState:
+    """Tracks the current canvas font/fill so back-to-back identical
+    setFont/setFillColor calls don't emit duplicate PDF operators."""
+
+    def __init__(self, c: canvas.Canvas) -> None:
+        self.c = c
+        self.reset()
+
+    def reset(self) -> None:
+        # Must be called after showPage: the canvas reverts to defaults.
+        self._font = None
+        self._fill = None
+
+    def set_font(self, name: str, size: int) -> None:
+        if self._font != (name, size):
+            self.c.setFont(name, size)
+            self._font = (name, size)
+
+    def set_fill(self, color) -> None:
+        if self._fill is not color:
+            self.c.setFillColor(color)
+            self._fill = color
+
+
 def draw_agreement_section(
     c: canvas.Canvas,
     width: float,
@@ -741,6 +954,7 @@ def draw_agreement_section(
     agreement_section: str,
     start_y: float,
 ) -> float:
+    state = _PdfState(c)
     y = start_y
     min_bottom_margin = 40
 
@@ -748,17 +962,40 @@ def draw_agreement_section(
         nonlocal y
         if y - required_height < min_bottom_margin:
             c.showPage()
-            c.setFillColor(colors.black)
+            state.reset()
+            state.set_fill(_BLACK)
             y = height - 56
 
+    def flow_lines(lines: List[str]) -> None:
+        # Batch consecutive lines into one text object so each run emits a
+        # single BT..ET block with TL leading instead of a Tm+Tj per line;
+        # a new object is only started across page breaks.
+        nonlocal y
+        to = c.beginText(36, y)
+        to.setFont(font_regular, 10)
+        to.setLeading(12)
+        for line in lines:
+            if line and y - 12 < min_bottom_margin:
+                c.drawText(to)
+                c.showPage()
+                state.reset()
+                state.set_fill(_BLACK)
+                y = height - 56
+                to = c.beginText(36, y)
+                to.setFont(font_regular, 10)
+                to.setLeading(12)
+            to.textLine(line)
+            y -= 12
+        c.drawText(to)
+
     ensure_space(24)
-    c.setFillColor(colors.black)
-    c.setFont(font_bold, 12)
+    state.set_fill(_BLACK)
+    state.set_font(font_bold, 12)
     c.drawString(36, y, "Agreement")
 
     y -= 20
     ensure_space(14)
-    c.setFont(font_regular, 10)
+    state.set_font(font_regular, 10)
     if (
         "Enterprise Subscription Agreement" in agreement_section
         and "Data Processing Addendum" in agreement_section
@@ -782,22 +1019,23 @@ def draw_agreement_section(
 
         rich_tokens: List[Tuple[str, str | None]] = []
         for text, url in segments:
-            for token in re.findall(r"\S+\s*", text):
+            for token in _WORD_WS.findall(text):
                 rich_tokens.append((token, url))
 
         for token, url in rich_tokens:
-            token_w = c.stringWidth(token, font_regular, 10)
+            token_w = measure(token, font_regular, 10)
             if cursor_x + token_w > right_x and cursor_x > left_x:
                 cursor_y -= line_height
                 if cursor_y <= 40:
                     c.showPage()
-                    c.setFillColor(colors.black)
-                    c.setFont(font_regular, 10)
+                    state.reset()
+                    state.set_fill(_BLACK)
+                    state.set_font(font_regular, 10)
                     cursor_y = height - 56
                 cursor_x = left_x
 
             if url:
-                c.setFillColor(colors.HexColor("#194b7d"))
+                state.set_fill(_LINK_BLUE)
                 c.drawString(cursor_x, cursor_y, token)
                 c.linkURL(
                     url,
@@ -806,79 +1044,71 @@ def draw_agreement_section(
                     thickness=0,
                 )
             else:
-                c.setFillColor(colors.black)
+                state.set_fill(_BLACK)
                 c.drawString(cursor_x, cursor_y, token)
             cursor_x += token_w
-        c.setFillColor(colors.black)
+        state.set_fill(_BLACK)
         y = cursor_y - 24
+        flow_lines(_AGREEMENT_PARAGRAPH_LINES)
     else:
         max_text_width = width - 72
-        wrapped_agreement = wrap_text_to_width(c, agreement_section, max_text_width, font_regular, 10)
-        for line in wrapped_agreement:
-            ensure_space(12)
-            c.drawString(36, y, line)
-            y -= 12
-        y -= 12
-
-    paragraph_lines = [
-        "The pricing and terms in this Order Form are Statsig, LLC's Proprietary Information. All fees are in U.S. dollars and",
-        "exclude all taxes. Customer is responsible for all applicable taxes, including, but not limited to, U.S. sales,",
-        "withholding tax, GST, and VAT. Capitalized terms not defined in this Order Form have the meanings assigned in the MSA.",
-        "If a direct conflict exists between this Order Form and the MSA, the terms of this Order Form will control.",
-        "",
-        "The parties through their duly authorized representative agree to the terms of this Order Form, effective as of",
-        "last signature date.",
-    ]
-    c.setFont(font_regular, 10)
-    for line in paragraph_lines:
-        if line == "":
-            y -= 12
-        else:
-            ensure_space(12)
-            c.setFont(font_regular, 10)
-            c.drawString(36, y, line)
-            y -= 12
+        # Pre-wrap everything into one flat run (a "" sentinel keeps the
+        # paragraph gap) so page breaks are the only font re-emissions.
+        all_lines = wrap_text_fast(agreement_section, max_text_width, font_regular, 10)
+        all_lines.append("")
+        all_lines.extend(_AGREEMENT_PARAGRAPH_LINES)
+        flow_lines(all_lines)
 
     y -= 30
     ensure_space(132)
-    c.setStrokeColor(colors.HexColor("#aaaaaa"))
+    c.setStrokeColor(_GRAY)
     c.line(36, y + 23, width - 36, y + 23)
 
     statsig_font_size = 12
-    c.setFont(font_bold, statsig_font_size)
+    state.set_font(font_bold, statsig_font_size)
     c.drawString(36, y, "Statsig, LLC:")
 
-    c.setFont(font_bold, 12)
+    state.set_font(font_bold, 12)
     c.drawString(330, y, "Customer:")
 
     mid_x = width / 2
     left_line_end = mid_x - 16
     right_line_end = width - 36
 
+    # Draw labels first, then stroke all eight signature underlines as one
+    # path so the content stream carries a single stroke operation.
+    underlines: List[Tuple[float, float, float]] = []
+
     y -= 28
-    c.setFont(font_regular, 10)
+    state.set_font(font_regular, 10)
     c.drawString(36, y, "By:")
-    c.line(62, y - 2, left_line_end, y - 2)
+    underlines.append((62, left_line_end, y - 2))
     c.drawString(330, y, "By:")
-    c.line(356, y - 2, right_line_end, y - 2)
+    underlines.append((356, right_line_end, y - 2))
 
     y -= 24
     c.drawString(36, y, "Name:")
-    c.line(70, y - 2, left_line_end, y - 2)
+    underlines.append((70, left_line_end, y - 2))
     c.drawString(330, y, "Name:")
-    c.line(364, y - 2, right_line_end, y - 2)
+    underlines.append((364, right_line_end, y - 2))
 
     y -= 24
     c.drawString(36, y, "Title:")
-    c.line(66, y - 2, left_line_end, y - 2)
+    underlines.append((66, left_line_end, y - 2))
     c.drawString(330, y, "Title:")
-    c.line(360, y - 2, right_line_end, y - 2)
+    underlines.append((360, right_line_end, y - 2))
 
     y -= 24
     c.drawString(36, y, "Date:")
-    c.line(66, y - 2, left_line_end, y - 2)
+    underlines.append((66, left_line_end, y - 2))
     c.drawString(330, y, "Date:")
-    c.line(360, y - 2, right_line_end, y - 2)
+    underlines.append((360, right_line_end, y - 2))
+
+    p = c.beginPath()
+    for x_start, x_end, line_y in underlines:
+        p.moveTo(x_start, line_y)
+        p.lineTo(x_end, line_y)
+    c.drawPath(p, stroke=1, fill=0)
     return y
 
 
@@ -899,11 +1129,50 @@ def _draw_text(
     else:
         c.setFont(font_regular, 10)
         c.drawString(x, y, label)
-    c.drawString(x + (c.stringWidth(label, font_bold, 10) if bold_label else 0), y, value)
+    c.drawString(x + (_label_width(label, font_bold, 10) if bold_label else 0), y, value)
+
+
+# Registered font metrics are process-global, so widths can be measured
+# without an open canvas; canvas.stringWidth just delegates here anyway.
+measure = pdfmetrics.stringWidth
+
+
+@functools.lru_cache(maxsize=1024)
+def _label_width(label: str, font_name: str, font_size: int) -> float:
+    # Font metrics are global, so cached label widths hold across canvases.
+    return measure(label, font_name, font_size)
+
+
+@functools.lru_cache(maxsize=8192)
+def _char_width(ch: str, font_name: str, font_size: int) -> float:
+    return pdfmetrics.stringWidth(ch, font_name, font_size)
+
+
+_PRINTABLE_ASCII = "".join(chr(i) for i in range(32, 127))
+
+
+@functools.lru_cache(maxsize=32)
+def _ascii_width_table(font_name: str, font_size: int) -> Dict[str, float]:
+    return {
+        ch: pdfmetrics.stringWidth(ch, font_name, font_size) for ch in _PRINTABLE_ASCII
+    }
+
+
+def _word_width(
+    word: str,
+    table: Dict[str, float],
+    font_name: str,
+    font_size: int,
+) -> float:
+    # The fonts used here have additive metrics (no kerning in reportlab's
+    # stringWidth), so summing per-char widths matches a full measure.
+    try:
+        return sum(table[ch] for ch in word)
+    except KeyError:
+        return measure(word, font_name, font_size)
 
 
 def wrap_text_to_width(
-    c: canvas.Canvas,
     text: str,
     max_width: float,
     font_name: str,
@@ -913,34 +1182,96 @@ def wrap_text_to_width(
     if not content:
         return [""]
     words = content.split()
+    table = _ascii_width_table(font_name, font_size)
+    space_w = table[" "]
     lines: List[str] = []
-    current = words[0]
+    line_words = [words[0]]
+    # Measure each word once and keep a running line width instead of
+    # re-measuring the whole growing line per word; the line string itself
+    # is only built when it is flushed.
+    current_w = _word_width(words[0], table, font_name, font_size)
     for word in words[1:]:
-        candidate = f"{current} {word}"
-        if c.stringWidth(candidate, font_name, font_size) <= max_width:
-            current = candidate
+        word_w = _word_width(word, table, font_name, font_size)
+        if current_w + space_w + word_w <= max_width:
+            line_words.append(word)
+            current_w += space_w + word_w
         else:
-            lines.append(current)
-            current = word
-    lines.append(current)
+            lines.append(" ".join(line_words))
+            line_words = [word]
+            current_w = word_w
+    lines.append(" ".join(line_words))
+    return lines
+
+
+def wrap_text_fast(
+    text: str,
+    max_width: float,
+    font_name: str,
+    font_size: int,
+) -> List[str]:
+    """Greedy wrap like wrap_text_to_width, but jumps by a character-count
+    estimate and measures candidate slices instead of every word, which keeps
+    stringWidth calls near one per emitted line on long paragraphs."""
+    content = (text or "").strip()
+    if not content:
+        return [""]
+    words = content.split()
+    avg = _char_width("a", font_name, font_size) or 1.0
+    est_chars = max(1, int(max_width / avg))
+    lines: List[str] = []
+    i = 0
+    n = len(words)
+    while i < n:
+        j = i + 1
+        count = len(words[i])
+        while j < n and count + 1 + len(words[j]) <= est_chars:
+            count += 1 + len(words[j])
+            j += 1
+        while j < n and measure(" ".join(words[i : j + 1]), font_name, font_size) <= max_width:
+            j += 1
+        while j > i + 1 and measure(" ".join(words[i:j]), font_name, font_size) > max_width:
+            j -= 1
+        lines.append(" ".join(words[i:j]))
+        i = j
     return lines
 
 
+@functools.lru_cache(maxsize=16)
+def _wrap_headers(
+    headers: Tuple[str, ...],
+    col_w: Tuple[float, ...],
+    font_bold: str,
+) -> Tuple[Tuple[Tuple[str, ...], ...], float]:
+    # Header text only varies with the warehouse type and page geometry, so
+    # the wrapped lines and row height are reused across every generated PDF.
+    wrapped: List[Tuple[str, ...]] = []
+    max_head_lines = 1
+    for h, w in zip(headers, col_w):
+        lines = tuple(wrap_text_to_width(h, w - 8, font_bold, 10))
+        wrapped.append(lines)
+        if len(lines) > max_head_lines:
+            max_head_lines = len(lines)
+    head_h = max(24, max_head_lines * 10 + 8)
+    return tuple(wrapped), head_h
+
+
 def preserve_input_lines(text: str) -> List[str]:
-    if text is None:
+    if not text:
         return [""]
-    lines = str(text).splitlines()
+    lines = text.splitlines() if isinstance(text, str) else str(text).splitlines()
     return lines if lines else [""]
 
 
 def create_branded_pdf(order: OrderData, services: List[Dict[str, str]], warehouse_type: str) -> bytes:
     buffer = io.BytesIO()
     c = canvas.Canvas(buffer, pagesize=LETTER)
+    state = _PdfState(c)
     width, height = LETTER
 
-    blue = colors.HexColor("#1f4675")
-    font_regular, font_bold = resolve_pdf_fonts()
-    font_italic = resolve_pdf_italic_font()
+    assets = _pdf_assets()
+    font_regular = assets["font_regular"]
+    font_bold = assets["font_bold"]
+    font_italic = assets["font_italic"]
 
     start = first_of_month(parse_date(order.start_date))
     end = compute_end_date(start, order.subscription_term_months)
@@ -948,10 +1279,10 @@ def create_branded_pdf(order: OrderData, services: List[Dict[str, str]], warehou
     end_str = display_date(end)
 
     # Header (first page only)
-    logo_path = find_header_logo_path()
-    if logo_path:
+    header_logo = assets["header_logo"]
+    if header_logo is not None:
         c.drawImage(
-            logo_path,
+            header_logo,
             (width - 190) / 2,
             height - 92,
             width=190,
@@ -960,17 +1291,17 @@ def create_branded_pdf(order: OrderData, services: List[Dict[str, str]], warehou
             mask="auto",
         )
     else:
-        c.setFont(font_bold, 26)
-        c.setFillColor(colors.black)
+        state.set_font(font_bold, 26)
+        state.set_fill(_BLACK)
         c.drawCentredString(width / 2, height - 82, "STATSIG")
-    c.setFont(font_bold, 12)
-    c.setFillColor(colors.black)
+    state.set_font(font_bold, 12)
+    state.set_fill(_BLACK)
     c.drawCentredString(width / 2, height - 112, "Order Form")
     header_line_y = height - 112
     if order.expiration_date:
         exp_date = parse_date(order.expiration_date).strftime("%m.%d.%Y")
-        c.setFont(font_italic, 10)
-        c.setFillColor(colors.black)
+        state.set_font(font_italic, 10)
+        state.set_fill(_BLACK)
         header_line_y -= 16
         c.drawCentredString(
             width / 2,
@@ -979,8 +1310,8 @@ def create_branded_pdf(order: OrderData, services: List[Dict[str, str]], warehou
         )
     if order.opportunity_type == "Expansion/Upsell" and order.addendum_effective_date:
         eff_date = parse_date(order.addendum_effective_date).strftime("%m/%d/%Y")
-        c.setFont(font_regular, 11)
-        c.setFillColor(colors.black)
+        state.set_font(font_regular, 11)
+        state.set_fill(_BLACK)
         header_line_y -= 16
         c.drawCentredString(
             width / 2,
@@ -988,14 +1319,15 @@ def create_branded_pdf(order: OrderData, services: List[Dict[str, str]], warehou
             f"This order form is an addendum to the order form with an effective date of {eff_date}.",
         )
 
-    c.setStrokeColor(colors.HexColor("#aaaaaa"))
+    # Page-one section dividers are collected and stroked as a single path
+    # once the last divider position is known.
     divider_y = header_line_y - 18
-    c.line(36, divider_y, width - 36, divider_y)
+    divider_ys: List[float] = [divider_y]
 
     # Customer info
     y = divider_y - 40
-    c.setFillColor(colors.black)
-    c.setFont(font_bold, 12)
+    state.set_fill(_BLACK)
+    state.set_font(font_bold, 12)
     c.drawString(36, y, "Customer Information")
 
     y -= 26
@@ -1009,13 +1341,13 @@ def create_branded_pdf(order: OrderData, services: List[Dict[str, str]], warehou
     _draw_text(c, 36, y, "Email: ", order.primary_contact_email, font_regular=font_regular, font_bold=font_bold)
 
     y -= 24
-    c.setFont(font_bold, 10)
+    state.set_font(font_bold, 10)
     c.drawString(36, y, "Ship To Address:")
     c.drawString(312, y, "Bill to Address:")
     ship_lines = preserve_input_lines(order.shipping_address)
     bill_lines = preserve_input_lines(order.billing_address)
     max_addr_lines = max(len(ship_lines), len(bill_lines))
-    c.setFont(font_regular, 10)
+    state.set_font(font_regular, 10)
     y -= 14
     for i in range(max_addr_lines):
         c.drawString(36, y, ship_lines[i] if i < len(ship_lines) else "")
@@ -1023,81 +1355,79 @@ def create_branded_pdf(order: OrderData, services: List[Dict[str, str]], warehou
         y -= 12
 
     y -= 6
-    c.setStrokeColor(colors.HexColor("#aaaaaa"))
-    c.line(36, y, width - 36, y)
+    divider_ys.append(y)
 
     # Terms
     y -= 23
-    c.setFont(font_bold, 12)
-    c.setFillColor(colors.black)
+    state.set_font(font_bold, 12)
+    state.set_fill(_BLACK)
     c.drawString(36, y, "Terms")
 
     left_label_x = 36
     right_label_x = 312
     # Use a one-space-equivalent visual gap between label and value.
-    gap_width = c.stringWidth(" ", font_regular, 10)
+    gap_width = _char_width(" ", font_regular, 10)
 
     y -= 25
     left_label = "Paid Subscription Term Start Date:"
-    c.setFont(font_bold, 10)
+    state.set_font(font_bold, 10)
     c.drawString(left_label_x, y, left_label)
-    c.setFillColor(colors.black)
-    c.setFont(font_regular, 10)
-    left_value_x = left_label_x + c.stringWidth(left_label, font_bold, 10) + gap_width
+    state.set_fill(_BLACK)
+    state.set_font(font_regular, 10)
+    left_value_x = left_label_x + _label_width(left_label, font_bold, 10) + gap_width
     c.drawString(left_value_x, y, start_str)
 
     right_label = "Billing Frequency:"
-    c.setFillColor(colors.black)
-    c.setFont(font_bold, 10)
+    state.set_fill(_BLACK)
+    state.set_font(font_bold, 10)
     c.drawString(right_label_x, y, right_label)
-    c.setFillColor(colors.black)
-    c.setFont(font_regular, 10)
-    right_value_x = right_label_x + c.stringWidth(right_label, font_bold, 10) + gap_width
+    state.set_fill(_BLACK)
+    state.set_font(font_regular, 10)
+    right_value_x = right_label_x + _label_width(right_label, font_bold, 10) + gap_width
     c.drawString(right_value_x, y, order.billing_frequency)
 
     y -= 16
     left_label = "Paid Subscription Term End Date:"
-    c.setFillColor(colors.black)
-    c.setFont(font_bold, 10)
+    state.set_fill(_BLACK)
+    state.set_font(font_bold, 10)
     c.drawString(left_label_x, y, left_label)
-    c.setFillColor(colors.black)
-    c.setFont(font_regular, 10)
-    left_value_x = left_label_x + c.stringWidth(left_label, font_bold, 10) + gap_width
+    state.set_fill(_BLACK)
+    state.set_font(font_regular, 10)
+    left_value_x = left_label_x + _label_width(left_label, font_bold, 10) + gap_width
     c.drawString(left_value_x, y, end_str)
 
     right_label = "Payment Terms:"
-    c.setFillColor(colors.black)
-    c.setFont(font_bold, 10)
+    state.set_fill(_BLACK)
+    state.set_font(font_bold, 10)
     c.drawString(right_label_x, y, right_label)
-    c.setFillColor(colors.black)
-    c.setFont(font_regular, 10)
-    right_value_x = right_label_x + c.stringWidth(right_label, font_bold, 10) + gap_width
+    state.set_fill(_BLACK)
+    state.set_font(font_regular, 10)
+    right_value_x = right_label_x + _label_width(right_label, font_bold, 10) + gap_width
     c.drawString(right_value_x, y, order.payment_terms)
 
     y -= 16
     left_label = "Payment Method:"
-    c.setFillColor(colors.black)
-    c.setFont(font_bold, 10)
+    state.set_fill(_BLACK)
+    state.set_font(font_bold, 10)
     c.drawString(left_label_x, y, left_label)
-    c.setFont(font_regular, 10)
-    left_value_x = left_label_x + c.stringWidth(left_label, font_bold, 10) + gap_width
+    state.set_font(font_regular, 10)
+    left_value_x = left_label_x + _label_width(left_label, font_bold, 10) + gap_width
     c.drawString(left_value_x, y, order.payment_method)
 
     right_label = "PO (if applicable):"
-    c.setFont(font_bold, 10)
+    state.set_font(font_bold, 10)
     c.drawString(right_label_x, y, right_label)
-    c.setFont(font_regular, 10)
-    right_value_x = right_label_x + c.stringWidth(right_label, font_bold, 10) + gap_width
+    state.set_font(font_regular, 10)
+    right_value_x = right_label_x + _label_width(right_label, font_bold, 10) + gap_width
     c.drawString(right_value_x, y, order.po_number)
 
     y -= 12
-    c.setStrokeColor(colors.HexColor("#aaaaaa"))
-    c.line(36, y, width - 36, y)
+    divider_ys.append(y)
 
     # Services header
     y -= 26
-    c.setFillColor(colors.black)
-    c.setFont(font_bold, 12)
+    state.set_fill(_BLACK)
+    state.set_font(font_bold, 12)
     c.drawString(36, y, "Services")
 
     # Dynamic table area
@@ -1107,42 +1437,49 @@ def create_branded_pdf(order: OrderData, services: List[Dict[str, str]], warehou
     table_w = right - left
 
     services = normalize_service_rows(services)
+    # Parse each fee once; both the cell formatting and the total reuse it.
+    for row in services:
+        row["_fee"] = safe_money(str(row.get("annual_service_fee", "")))
     column_spec = table_columns_for_warehouse(warehouse_type)
     headers = [label for _, label in column_spec]
     widths = [0.25, 0.23, 0.21, 0.12, 0.19] if len(column_spec) == 5 else [0.27, 0.33, 0.20, 0.20]
     col_w = [table_w * w for w in widths]
 
     rows = max(1, len(services))
-    header_wrapped = [
-        wrap_text_to_width(c, h, col_w[i] - 8, font_bold, 10) for i, h in enumerate(headers)
-    ]
-    head_h = max(24, max(len(lines) for lines in header_wrapped) * 10 + 8)
+    header_wrapped, head_h = _wrap_headers(tuple(headers), tuple(col_w), font_bold)
 
-    row_wrapped: List[List[List[str]]] = []
+    # Measure once per cell, keeping the formatted value and layout hints so
+    # the render loop below does not re-run the money formatting.
+    row_wrapped: List[List[Tuple[List[str], bool, bool]]] = []
     row_heights: List[float] = []
+    body_h = 0.0
     for row in services:
-        wrapped_cells: List[List[str]] = []
+        wrapped_cells: List[Tuple[List[str], bool, bool]] = []
         max_lines = 1
         for i, (key, _) in enumerate(column_spec[1:], start=1):
             value = row.get(key, "")
-            if key == "annual_service_fee" and value != "":
-                value = fmt_money(safe_money(str(value)))
-            lines = wrap_text_to_width(c, str(value), col_w[i] - 8, font_regular, 10)
-            wrapped_cells.append(lines)
+            is_money = key == "annual_service_fee"
+            if is_money and value != "":
+                value = fmt_money(row["_fee"])
+            text_value = str(value)
+            lines = wrap_text_to_width(text_value, col_w[i] - 8, font_regular, 10)
+            wrapped_cells.append((lines, is_money, bool(text_value.strip())))
             max_lines = max(max_lines, len(lines))
         row_wrapped.append(wrapped_cells)
-        row_heights.append(max(22, max_lines * 10 + 8))
+        row_h = max(22, max_lines * 10 + 8)
+        row_heights.append(row_h)
+        body_h += row_h
 
     total_row_h = 22
-    table_h = head_h + sum(row_heights) + total_row_h
+    table_h = head_h + body_h + total_row_h
 
-    c.setStrokeColor(colors.black)
-    c.setFillColor(blue)
+    c.setStrokeColor(_BLACK)
+    state.set_fill(_BLUE)
     c.rect(left, top - head_h, table_w, head_h, stroke=1, fill=1)
 
     x = left
-    c.setFillColor(colors.white)
-    c.setFont(font_bold, 10)
+    state.set_fill(_WHITE)
+    state.set_font(font_bold, 10)
     for i, lines in enumerate(header_wrapped):
         block_h = len(lines) * 10
         y0 = top - ((head_h - block_h) / 2) - 8
@@ -1154,16 +1491,16 @@ def create_branded_pdf(order: OrderData, services: List[Dict[str, str]], warehou
     x = left
     for w in col_w[:-1]:
         x += w
-        c.setStrokeColor(colors.black)
+        c.setStrokeColor(_BLACK)
         c.line(x, top, x, top - head_h)
 
     # Body anchors
-    y_total_divider = top - head_h - sum(row_heights)
+    y_total_divider = top - head_h - body_h
     c.line(left, y_total_divider, right, y_total_divider)
 
     # Row values
-    c.setFillColor(colors.black)
-    c.setFont(font_regular, 10)
+    state.set_fill(_BLACK)
+    state.set_font(font_regular, 10)
     period_text = f"{start_str} - {end_str}"
     merged_top = top - head_h
     merged_bottom = y_total_divider
@@ -1173,93 +1510,130 @@ def create_branded_pdf(order: OrderData, services: List[Dict[str, str]], warehou
         c.rect(left, merged_bottom, col_w[0], merged_top - merged_bottom, stroke=1, fill=0)
 
     y_cursor = top - head_h
-    for idx, row in enumerate(services):
+    for row_h, cell_lines in zip(row_heights, row_wrapped):
         row_top = y_cursor
-        row_h = row_heights[idx]
-        cell_lines = row_wrapped[idx]
         x = left + col_w[0]
-        for i, lines in enumerate(cell_lines):
-            key = column_spec[i + 1][0]
-            raw_value = row.get(key, "")
-            if key == "annual_service_fee" and raw_value != "":
-                raw_value = fmt_money(safe_money(str(raw_value)))
+        for i, (lines, is_money, has_content) in enumerate(cell_lines):
             block_h = len(lines) * 10
             line_y = row_top - ((row_h - block_h) / 2) - 8
             for line in lines:
-                if key == "annual_service_fee":
+                if is_money:
                     c.drawRightString(x + col_w[i + 1] - 4, line_y, line)
                 else:
                     c.drawCentredString(x + (col_w[i + 1] / 2), line_y, line)
                 line_y -= 10
-            if str(raw_value).strip():
+            if has_content:
                 c.rect(x, row_top - row_h, col_w[i + 1], row_h, stroke=1, fill=0)
             x += col_w[i + 1]
         y_cursor -= row_h
 
     # Total row
-    total = sum(safe_money(str(row.get("annual_service_fee", ""))) for row in services)
+    total = sum(row["_fee"] for row in services)
     total_y = y_total_divider - 15
     last_col_left = left + sum(col_w[:-1])
     last_col_center = last_col_left + (col_w[-1] / 2)
     prev_col_center = (
         left + sum(col_w[:-2]) + (col_w[-2] / 2) if len(col_w) > 1 else last_col_center
     )
-    c.setFont(font_regular, 10)
+    state.set_font(font_regular, 10)
     if len(col_w) > 1:
-        c.setFillColor(colors.black)
+        state.set_fill(_BLACK)
         c.drawCentredString(prev_col_center, total_y, "Total:")
         c.rect(last_col_left - col_w[-2], y_total_divider - total_row_h, col_w[-2], total_row_h, stroke=1, fill=0)
-    c.setFillColor(colors.black)
+    state.set_fill(_BLACK)
     c.drawRightString(last_col_left + col_w[-1] - 4, total_y, fmt_money(total))
     c.rect(last_col_left, y_total_divider - total_row_h, col_w[-1], total_row_h, stroke=1, fill=0)
 
     # Footer
     y_after = top - table_h - 22
-    c.setFillColor(colors.black)
-    c.setFont(font_regular, 10)
+    state.set_fill(_BLACK)
+    state.set_font(font_regular, 10)
     c.drawString(36, y_after, "For information on the Statsig platform, refer to https://docs.statsig.com/")
     y_after -= 14
     c.drawString(36, y_after, "For information on Statsig support, refer to https://docs.statsig.com/support-options")
 
     y_after -= 10
-    c.setStrokeColor(colors.HexColor("#aaaaaa"))
-    c.line(36, y_after, width - 36, y_after)
+    divider_ys.append(y_after)
+    c.setStrokeColor(_GRAY)
+    divider_path = c.beginPath()
+    for divider_line_y in divider_ys:
+        divider_path.moveTo(36, divider_line_y)
+        divider_path.lineTo(width - 36, divider_line_y)
+    c.drawPath(divider_path, stroke=1, fill=0)
 
     computed_excess_rate = compute_excess_usage_rate(services, warehouse_type)
     auto_usage_terms = build_usage_terms_for_products(
         warehouse_type,
-        products_from_services_rows(services),
+        tuple(products_from_services_rows(services)),
         computed_excess_rate,
     )
     usage_text = auto_usage_terms if auto_usage_terms else (order.usage_terms or "")
     y_after -= 23
 
-    c.setFont(font_bold, 12)
-    c.setFillColor(colors.black)
+    state.set_font(font_bold, 12)
+    state.set_fill(_BLACK)
     c.drawString(36, y_after, "Usage Terms")
 
     y_after -= 20
-    c.setFont(font_regular, 10)
-    c.setFillColor(colors.black)
-
-    max_text_width = width - 72
-    paragraph_blocks = usage_text.split("\n")
-    for paragraph in paragraph_blocks:
-        if not paragraph.strip():
-            y_after -= 7
+    state.set_font(font_regular, 10)
+    state.set_fill(_BLACK)
+
+    # Platypus wraps and draws each paragraph in optimized code, so feed the
+    # usage text through a Frame instead of hand-measuring every line.
+    usage_style = ParagraphStyle(
+        "usage_terms",
+        fontName=font_regular,
+        fontSize=10,
+        leading=12,
+        spaceAfter=7,
+    )
+    story = [
+        Paragraph(escape(block), usage_style)
+        for block in usage_text.split("\n")
+        if block.strip()
+    ]
+    frame = Frame(
+        36,
+        40,
+        width - 72,
+        max(y_after - 40, 12),
+        leftPadding=0,
+        bottomPadding=0,
+        rightPadding=0,
+        topPadding=0,
+    )
+    frame.addFromList(story, c)
+    while story:
+        # addFromList never splits flowables, so a paragraph taller than the
+        # remaining space must be split here or its text would be deferred
+        # wholesale -- or dropped entirely once it exceeds a full page.
+        parts = frame.split(story[0], c)
+        if len(parts) > 1:
+            story[0:1] = parts
+            frame.addFromList(story, c)
             continue
-        lines = wrap_text_to_width(c, paragraph, max_text_width, font_regular, 10)
-        for line in lines:
-            if y_after <= 40:
-                c.showPage()
-                c.setFillColor(colors.black)
-                c.setFont(font_regular, 10)
-                y_after = height - 56
-            c.drawString(36, y_after, line)
-            y_after -= 12
+        c.showPage()
+        state.reset()
+        frame = Frame(
+            36,
+            40,
+            width - 72,
+            height - 96,
+            leftPadding=0,
+            bottomPadding=0,
+            rightPadding=0,
+            topPadding=0,
+        )
+        placed = len(story)
+        frame.addFromList(story, c)
+        if len(story) == placed and len(frame.split(story[0], c)) <= 1:
+            # Unsplittable flowable taller than a full page; bail out rather
+            # than loop forever.
+            break
+    y_after = frame._y
 
     y_after -= 5
-    c.setStrokeColor(colors.HexColor("#aaaaaa"))
+    c.setStrokeColor(_GRAY)
     c.line(36, y_after, width - 36, y_after)
 
     # Agreement section follows directly after Usage Terms.
@@ -1284,7 +1658,8 @@ def create_branded_pdf(order: OrderData, services: List[Dict[str, str]], warehou
         y_after - 23,
     )
     c.save()
-    buffer.seek(0)
+    # getbuffer avoids the extra copy getvalue makes; slice off the unused
+    # preallocated tail.
     return buffer.getvalue()
 
 
@@ -1294,68 +1669,381 @@ def wrap_text(text: str, max_chars: int) -> List[str]:
         return [""]
 
     lines: List[str] = []
-    current = words[0]
+    line_words = [words[0]]
+    line_len = len(words[0])
     for word in words[1:]:
-        candidate = f"{current} {word}"
-        if len(candidate) <= max_chars:
-            current = candidate
+        # Track the running length instead of building candidate strings.
+        candidate_len = line_len + 1 + len(word)
+        if candidate_len <= max_chars:
+            line_words.append(word)
+            line_len = candidate_len
         else:
-            lines.append(current)
-            current = word
-    lines.append(current)
+            lines.append(" ".join(line_words))
+            line_words = [word]
+            line_len = len(word)
+    lines.append(" ".join(line_words))
     return lines
 
 
+def _nonblank(value: str) -> bool:
+    # Truthiness plus isspace avoids the string allocation .strip() makes.
+    return bool(value) and not value.isspace()
+
+
 def customer_fields_complete(order: OrderData) -> bool:
     upsell_ok = (
         order.opportunity_type != "Expansion/Upsell"
-        or bool(order.addendum_effective_date.strip())
+        or _nonblank(order.addendum_effective_date)
     )
-    return all(
-        [
-            order.account_name.strip(),
-            order.primary_contact_name.strip(),
-            order.primary_contact_email.strip(),
-            order.billing_email.strip(),
-            order.shipping_address.strip(),
-            order.billing_address.strip(),
-            order.opportunity_type.strip(),
-            upsell_ok,
-        ]
+    return (
+        _nonblank(order.account_name)
+        and _nonblank(order.primary_contact_name)
+        and _nonblank(order.primary_contact_email)
+        and _nonblank(order.billing_email)
+        and _nonblank(order.shipping_address)
+        and _nonblank(order.billing_address)
+        and _nonblank(order.opportunity_type)
+        and upsell_ok
     )
 
 
 def terms_fields_complete(order: OrderData, start_valid: bool) -> bool:
     billing_id_ok = (
-        order.payment_method == "Bank Transfer" or bool(order.billing_id.strip())
+        order.payment_method == "Bank Transfer" or _nonblank(order.billing_id)
     )
-    return all(
-        [
-            start_valid,
-            order.subscription_term_months >= 1,
-            order.billing_frequency.strip(),
-            order.payment_terms.strip(),
-            order.payment_method.strip(),
-            billing_id_ok,
-        ]
+    return (
+        start_valid
+        and order.subscription_term_months >= 1
+        and _nonblank(order.billing_frequency)
+        and _nonblank(order.payment_terms)
+        and _nonblank(order.payment_method)
+        and billing_id_ok
     )
 
 
-def table_columns_for_warehouse(warehouse_type: str) -> List[Tuple[str, str]]:
+_CREDIT_COLS: Tuple[Tuple[str, str], ...] = (
+    ("subscription_period", "Subscription Term"),
+    ("service", "Services"),
+    ("annual_usage_commitment", "Credits"),
+    ("annual_service_fee", "Annual Fee"),
+)
+
+_STANDARD_COLS: Tuple[Tuple[str, str], ...] = (
+    ("subscription_period", "Subscription Period"),
+    ("service", "Service"),
+    ("annual_usage_commitment", "Annual Usage Commitment"),
+    ("unit", "Unit"),
+    ("annual_service_fee", "Annual Service Fee"),
+)
+
+
+def table_columns_for_warehouse(warehouse_type: str) -> Tuple[Tuple[str, str], ...]:
+    # Returning the shared tuples avoids allocating a fresh column list on
+    # every PDF render and rerun.
     if warehouse_type in {"Credit", "Credit/Usage Based", "Usage Based Pricing"}:
-        return [
-            ("subscription_period", "Subscription Term"),
-            ("service", "Services"),
-            ("annual_usage_commitment", "Credits"),
-            ("annual_service_fee", "Annual Fee"),
-        ]
-    return [
-        ("subscription_period", "Subscription Period"),
-        ("service", "Service"),
-        ("annual_usage_commitment", "Annual Usage Commitment"),
-        ("unit", "Unit"),
-        ("annual_service_fee", "Annual Service Fee"),
+        return _CREDIT_COLS
+    return _STANDARD_COLS
+
+
+@st.cache_resource
+def _column_config_for(warehouse_type: str) -> Dict[str, object]:
+    # The TextColumn wrappers are immutable per warehouse type; build them
+    # once per type instead of per rerun. cache_resource because the config
+    # objects are not reliably picklable.
+    column_spec = table_columns_for_warehouse(warehouse_type)
+    return {
+        key: (
+            st.column_config.TextColumn(label, disabled=True)
+            if key == "subscription_period"
+            else st.column_config.TextColumn(
+                label, help="Use whole numbers for experimentation; other rows are N/A."
+            )
+            if key == "annual_usage_commitment"
+            else st.column_config.TextColumn(label)
+            if key == "annual_service_fee"
+            else label
+        )
+        for key, label in column_spec
+        if key != "subscription_period"
+    }
+
+
+def _order_key(order: OrderData) -> Tuple:
+    # astuple keeps field order stable; special_terms is the only list field,
+    # so convert it to make the whole key hashable.
+    return tuple(tuple(v) if isinstance(v, list) else v for v in astuple(order))
+
+
+def _services_key(rows: List[Dict[str, str]]) -> Tuple:
+    return tuple(tuple(sorted(r.items())) for r in rows)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_pdf(order_key: Tuple, services_key: Tuple, warehouse_type: str) -> bytes:
+    """Rebuild the PDF only when the order, services, or warehouse change.
+
+    Reruns triggered by unrelated widgets reuse the cached bytes instead of
+    regenerating the document on every keystroke.
+    """
+    order = OrderData(*(list(v) if isinstance(v, tuple) else v for v in order_key))
+    services = [dict(items) for items in services_key]
+    return create_branded_pdf(order, services, warehouse_type)
+
+
+def _with_support_last(products: List[str]) -> List[str]:
+    """Selected products with "Support" forced to the end.
+
+    Returns the input list untouched when it is already in that shape, so
+    the common rerun path allocates nothing.
+    """
+    if products and products[-1] == "Support" and products.count("Support") == 1:
+        return products
+    return [p for p in products if p != "Support"] + ["Support"]
+
+
+def persist_order(order: OrderData) -> bool:
+    """Write the order back to session state only when a field changed.
+
+    asdict deep-copies every field on each call, and most reruns leave the
+    order untouched; a cheap astuple hash gates the re-serialization.
+    Returns True when the order was re-persisted.
+    """
+    h = hash(_order_key(order))
+    if st.session_state.get("_order_hash") == h:
+        return False
+    st.session_state.order_data = asdict(order)
+    st.session_state._order_hash = h
+    return True
+
+
+@st.fragment
+def _legal_terms_fragment() -> None:
+    # Terms/expiration widgets rerun in isolation; the rest of the script is
+    # only re-executed when the edits actually change the persisted order.
+    order = OrderData(**st.session_state.order_data)
+    services_df = normalize_service_rows(st.session_state.services_rows)
+    selected_products_with_support = _with_support_last(st.session_state.selected_products)
+    excess_usage_rate = compute_excess_usage_rate(
+        services_df, st.session_state.warehouse_type
+    )
+
+    order.terms_type = st.radio(
+        "Terms",
+        TERMS_OPTIONS,
+        index=TERMS_OPTIONS_IDX.get(order.terms_type, 0),
+        horizontal=True,
+    )
+    if order.terms_type == "MSA":
+        msa_default = parse_date(order.msa_execution_date) if order.msa_execution_date else None
+        selected_msa_date = st.date_input(
+            "MSA Execution Date",
+            value=msa_default,
+            format="MM/DD/YYYY",
+        )
+        order.msa_execution_date = (
+            display_date(selected_msa_date) if selected_msa_date is not None else ""
+        )
+    else:
+        order.msa_execution_date = ""
+
+    special_term_options = [
+        "price cap",
+        "no auto-renewal",
+        "no logo rights",
+        "one time discount",
     ]
+    order.special_terms = normalize_special_terms(
+        st.multiselect(
+            "Legal: Special Terms",
+            options=special_term_options,
+            default=[t for t in order.special_terms if t in special_term_options],
+            placeholder="None",
+        )
+    )
+    usage_terms_by_products = build_usage_terms_for_products(
+        st.session_state.warehouse_type,
+        tuple(selected_products_with_support),
+        excess_usage_rate,
+    )
+    if usage_terms_by_products:
+        order.usage_terms = usage_terms_by_products
+    else:
+        order.usage_terms = ", ".join(order.special_terms) if order.special_terms else "None"
+
+    today_date = date.today()
+    order.expiration_enabled = st.checkbox(
+        "Include Expiration Date",
+        value=bool(order.expiration_enabled or order.expiration_date),
+    )
+    if order.expiration_enabled:
+        expiration_default = parse_date(order.expiration_date) if order.expiration_date else None
+        if expiration_default is not None and expiration_default < today_date:
+            expiration_default = today_date
+        selected_expiration = st.date_input(
+            "Expiration Date",
+            value=expiration_default,
+            format="MM/DD/YYYY",
+            help="Required when enabled",
+        )
+        if selected_expiration is not None and selected_expiration < today_date:
+            st.error("Expiration Date must be today or later.")
+            order.expiration_date = display_date(today_date)
+        else:
+            order.expiration_date = (
+                display_date(selected_expiration) if selected_expiration is not None else ""
+            )
+    else:
+        order.expiration_date = ""
+
+    if persist_order(order):
+        # The preview and nav fragments read the persisted order, so refresh
+        # the whole page once per committed change.
+        st.rerun(scope="app")
+
+
+# Streamlit serves ./static at /app/static/* when server.enableStaticServing
+# is on (see .streamlit/config.toml).
+_STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+# Previews from ended sessions are orphaned; sweep anything older than this
+# when a new session allocates its preview name.
+_PREVIEW_TTL_SECONDS = 24 * 60 * 60
+
+
+def _sweep_stale_previews() -> None:
+    # Best effort: these are customer PDFs, so don't let them pile up on a
+    # long-running server just because no session deletes its own file.
+    cutoff = time.time() - _PREVIEW_TTL_SECONDS
+    try:
+        names = os.listdir(_STATIC_DIR)
+    except OSError:
+        return
+    for name in names:
+        if not (name.startswith("preview-") and name.endswith(".pdf")):
+            continue
+        path = os.path.join(_STATIC_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+        except OSError:
+            continue
+
+
+def _write_preview_file(pdf_bytes: bytes) -> str:
+    """Persist the preview PDF under ./static and return its URL.
+
+    Returns "" when static serving is off or the write fails, in which case
+    the caller falls back to the base64 data URL.
+    """
+    if not st.config.get_option("server.enableStaticServing"):
+        return ""
+    if "_preview_name" not in st.session_state:
+        # Per-session name so concurrent sessions don't clobber each other;
+        # once per session, clear out previews older sessions left behind.
+        _sweep_stale_previews()
+        st.session_state._preview_name = f"preview-{uuid.uuid4().hex}.pdf"
+    try:
+        os.makedirs(_STATIC_DIR, exist_ok=True)
+        with open(os.path.join(_STATIC_DIR, st.session_state._preview_name), "wb") as fh:
+            fh.write(pdf_bytes)
+    except OSError:
+        return ""
+    return f"/app/static/{st.session_state._preview_name}"
+
+
+@st.fragment
+def _preview_fragment() -> None:
+    order = OrderData(**st.session_state.order_data)
+    services_df = normalize_service_rows(st.session_state.services_rows)
+    selected_products_with_support = _with_support_last(st.session_state.selected_products)
+    column_spec = table_columns_for_warehouse(st.session_state.warehouse_type)
+    total = math.fsum(row.get("annual_service_fee", 0.0) for row in services_df)
+    computed_end_date = display_date(
+        compute_end_date(parse_date(order.start_date), order.subscription_term_months)
+    )
+
+    st.markdown("**Document Preview**")
+    pdf_key = (_order_key(order), _services_key(services_df), st.session_state.warehouse_type)
+    preview_pdf = _cached_pdf(*pdf_key)
+    if (
+        st.session_state.get("_preview_key") != pdf_key
+        and st.session_state.get("_preview_pdf") != preview_pdf
+    ):
+        # Rebuild the iframe markup only when the bytes actually changed;
+        # the key check alone misses edits that render to an identical
+        # document. Prefer a static URL so the PDF travels as a plain HTTP
+        # GET instead of a base64 data URL 4/3 its size inside the DOM.
+        version = st.session_state.get("_preview_file_version", 0) + 1
+        st.session_state._preview_file_version = version
+        preview_url = _write_preview_file(preview_pdf)
+        if preview_url:
+            src = f"{preview_url}?v={version}"
+        else:
+            src = "data:application/pdf;base64," + base64.b64encode(preview_pdf).decode("utf-8")
+        st.session_state._preview_html = f"""
+        <iframe
+          src="{src}"
+          width="100%"
+          height="700px"
+          style="border: 1px solid #ddd; border-radius: 8px;"
+        ></iframe>
+        """
+        st.session_state._preview_pdf = preview_pdf
+    st.session_state._preview_key = pdf_key
+    # components.html must run every pass or Streamlit drops the iframe;
+    # identical payloads are deduped by the forward-message cache, so the
+    # browser keeps the already-parsed PDF instead of remounting it.
+    components.html(st.session_state._preview_html, height=720)
+    with st.expander("Preview Data", expanded=False):
+        # Debug output; rebuild the dict only when the document key moved so
+        # collapsed reruns skip the asdict copy and services dump.
+        json_key = (pdf_key, tuple(selected_products_with_support), st.session_state.support_tier)
+        if st.session_state.get("_preview_json_key") != json_key:
+            st.session_state._preview_json = {
+                **asdict(order),
+                "computed_subscription_end_date": computed_end_date,
+                "warehouse_type": st.session_state.warehouse_type,
+                "selected_products": selected_products_with_support,
+                "support_tier": st.session_state.support_tier,
+                "columns": [label for _, label in column_spec],
+                "services": services_df,
+                "calculated_total": fmt_money(total),
+                "terms_type": order.terms_type,
+            }
+            st.session_state._preview_json_key = json_key
+        st.json(st.session_state._preview_json)
+
+
+@st.fragment
+def _nav_fragment() -> None:
+    order = OrderData(**st.session_state.order_data)
+    services_df = normalize_service_rows(st.session_state.services_rows)
+    nav1, nav2 = st.columns(2)
+    with nav1:
+        if st.button("Back to Product Selection"):
+            st.session_state.form_step = 3
+            st.rerun(scope="app")
+    with nav2:
+        if st.button("Generate PDF", type="primary"):
+            if order.terms_type == "MSA" and not order.msa_execution_date:
+                st.error("MSA Execution Date is required when Terms is MSA.")
+                st.stop()
+            if order.expiration_enabled and not order.expiration_date:
+                st.error("Expiration Date is required when enabled.")
+                st.stop()
+            pdf_bytes = _cached_pdf(
+                _order_key(order),
+                _services_key(services_df),
+                st.session_state.warehouse_type,
+            )
+            output_filename = build_output_filename(order.account_name)
+            st.success("Branded PDF generated.")
+            st.download_button(
+                "Download PDF",
+                data=pdf_bytes,
+                file_name=output_filename,
+                mime="application/pdf",
+            )
 
 
 def main() -> None:
@@ -1394,6 +2082,7 @@ def main() -> None:
         st.session_state.services_rows = DEFAULT_SERVICES
     if "order_data" not in st.session_state:
         st.session_state.order_data = asdict(OrderData())
+        st.session_state._order_hash = hash(_order_key(OrderData()))
     if "form_step" not in st.session_state:
         st.session_state.form_step = 1
     if "uploaded_once" not in st.session_state:
@@ -1481,14 +2170,12 @@ def main() -> None:
                 disabled=same_email,
             )
         with col_right:
-            opportunity_options = ["New Logo", "Renewal", "Expansion/Upsell"]
             order.opportunity_type = st.radio(
                 "Opportunity Type",
-                opportunity_options,
-                index=(
-                    opportunity_options.index(order.opportunity_type)
-                    if order.opportunity_type in opportunity_options
-                    else (0 if st.session_state.input_source_mode == "Q/A" else None)
+                OPPORTUNITY_OPTIONS,
+                index=OPPORTUNITY_IDX.get(
+                    order.opportunity_type,
+                    0 if st.session_state.input_source_mode == "Q/A" else None,
                 ),
                 horizontal=True,
             )
@@ -1540,7 +2227,7 @@ def main() -> None:
                 st.warning("Upsell Effective Date is required when Opportunity Type is Expansion/Upsell.")
         if st.button("Continue to Terms", type="primary", disabled=not step1_ok):
             st.session_state.form_step = 2
-            st.session_state.order_data = asdict(order)
+            persist_order(order)
             st.rerun()
 
     elif st.session_state.form_step == 2:
@@ -1566,17 +2253,14 @@ def main() -> None:
                     value=max(1, int(order.subscription_term_months or 12)),
                 )
             )
-            computed_end = compute_end_date(parse_date(order.start_date), order.subscription_term_months)
+            computed_end = compute_end_date(first_of_month(selected_start), order.subscription_term_months)
             st.text_input("Computed Subscription End Date", value=display_date(computed_end), disabled=True)
 
         with right_col:
-            payment_method_options = ["Bank Transfer", "AWS Billing", "GCP Billing", "Azure Billing"]
             order.payment_method = st.selectbox(
                 "Payment Method",
-                payment_method_options,
-                index=payment_method_options.index(order.payment_method)
-                if order.payment_method in payment_method_options
-                else 0,
+                PAYMENT_METHOD_OPTIONS,
+                index=PAYMENT_METHOD_IDX.get(order.payment_method, 0),
             )
             if order.payment_method != "Bank Transfer":
                 order.billing_id = st.text_input(
@@ -1588,22 +2272,16 @@ def main() -> None:
             else:
                 order.billing_id = ""
 
-            billing_frequency_options = ["Annual", "Semi-Annual", "Quarterly"]
             order.billing_frequency = st.selectbox(
                 "Billing Frequency",
-                billing_frequency_options,
-                index=billing_frequency_options.index(order.billing_frequency)
-                if order.billing_frequency in billing_frequency_options
-                else 0,
+                BILLING_FREQUENCY_OPTIONS,
+                index=BILLING_FREQUENCY_IDX.get(order.billing_frequency, 0),
             )
 
-            payment_term_options = ["Net 30", "Net 45", "Net 60", "Net 90"]
             order.payment_terms = st.selectbox(
                 "Payment Terms",
-                payment_term_options,
-                index=payment_term_options.index(order.payment_terms)
-                if order.payment_terms in payment_term_options
-                else 0,
+                PAYMENT_TERM_OPTIONS,
+                index=PAYMENT_TERM_IDX.get(order.payment_terms, 0),
             )
             order.po_number = st.text_input("PO Number (Optional)", value=order.po_number)
 
@@ -1611,13 +2289,13 @@ def main() -> None:
         with nav1:
             if st.button("Back to Customer Information"):
                 st.session_state.form_step = 1
-                st.session_state.order_data = asdict(order)
+                persist_order(order)
                 st.rerun()
         with nav2:
             step2_ok = terms_fields_complete(order, start_valid)
             if st.button("Continue to Product Selection", type="primary", disabled=not step2_ok):
                 st.session_state.form_step = 3
-                st.session_state.order_data = asdict(order)
+                persist_order(order)
                 st.rerun()
 
     elif st.session_state.form_step == 3:
@@ -1626,16 +2304,18 @@ def main() -> None:
         st.session_state.warehouse_type = st.selectbox(
             "1. Warehouse type",
             WAREHOUSE_TYPES,
-            index=WAREHOUSE_TYPES.index(st.session_state.warehouse_type)
-            if st.session_state.warehouse_type in WAREHOUSE_TYPES
-            else 0,
+            index=WAREHOUSE_TYPES_IDX.get(st.session_state.warehouse_type, 0),
         )
 
         product_options = product_options_by_warehouse(st.session_state.warehouse_type)
         if st.session_state.warehouse_type == "Usage Based Pricing":
             st.session_state.warehouse_type = "Credit/Usage Based"
+        # The warehouse type is read a dozen more times below; hoist the
+        # session-state lookup once it can no longer change this rerun.
+        warehouse_type = st.session_state.warehouse_type
+        column_spec = table_columns_for_warehouse(warehouse_type)
 
-        if st.session_state.warehouse_type == "Credit/Usage Based":
+        if warehouse_type == "Credit/Usage Based":
             st.session_state.selected_products = USAGE_BASED_REQUIRED_PRODUCTS
             st.info(
                 "Credit requires: Warehouse Native and Platform Fee. Support is required via Support Tier."
@@ -1644,27 +2324,23 @@ def main() -> None:
             for p in USAGE_BASED_REQUIRED_PRODUCTS:
                 st.write(f"- {p}")
             st.session_state.warehouse_native_experimentation = ""
-        elif st.session_state.warehouse_type == "Warehouse Native":
+        elif warehouse_type == "Warehouse Native":
             st.markdown("**Products**")
             st.session_state.warehouse_native_experimentation = st.radio(
                 "Experimentation Product (select one)",
-                options=["None"] + WAREHOUSE_NATIVE_EXPERIMENTATION_OPTIONS,
-                index=(
-                    (["None"] + WAREHOUSE_NATIVE_EXPERIMENTATION_OPTIONS).index(
-                        st.session_state.warehouse_native_experimentation
-                    )
-                    if st.session_state.warehouse_native_experimentation
-                    in (["None"] + WAREHOUSE_NATIVE_EXPERIMENTATION_OPTIONS)
-                    else 0
+                options=WN_EXPERIMENTATION_CHOICES,
+                index=WN_EXPERIMENTATION_IDX.get(
+                    st.session_state.warehouse_native_experimentation, 0
                 ),
             )
             wn_other_options = list(WAREHOUSE_NATIVE_OTHER_PRODUCTS)
             if st.session_state.warehouse_native_experimentation == "Experimentation: Analysis Only":
                 wn_other_options = [p for p in wn_other_options if p != "Feature Gates and SDKs"]
+            wn_other_set = frozenset(wn_other_options)
             warehouse_native_others_default = [
                 p
                 for p in st.session_state.selected_products
-                if p in wn_other_options
+                if p in wn_other_set
             ]
             warehouse_native_others = st.multiselect(
                 "Other Products (multi-select)",
@@ -1683,7 +2359,9 @@ def main() -> None:
         else:
             st.markdown("**Products**")
             default_selected = [
-                p for p in st.session_state.selected_products if p in product_options
+                p
+                for p in st.session_state.selected_products
+                if p in _product_options_set(warehouse_type)
             ]
             st.session_state.selected_products = st.multiselect(
                 "Products",
@@ -1695,19 +2373,16 @@ def main() -> None:
         st.session_state.support_tier = st.selectbox(
             "Support Tier",
             SUPPORT_TIERS,
-            index=SUPPORT_TIERS.index(st.session_state.support_tier)
-            if st.session_state.support_tier in SUPPORT_TIERS
-            else 0,
+            index=SUPPORT_TIERS_IDX.get(st.session_state.support_tier, 0),
         )
-        selected_products_with_support = [
-            p for p in st.session_state.selected_products if p != "Support"
-        ] + ["Support"]
+        selected_products_with_support = _with_support_last(st.session_state.selected_products)
 
+        # A tuple compares in one C-level call; no join/concat per rerun.
         product_signature = (
-            f"{st.session_state.warehouse_type}|"
-            f"{','.join(selected_products_with_support)}|"
-            f"{st.session_state.warehouse_native_experimentation}|"
-            f"{st.session_state.support_tier}"
+            warehouse_type,
+            tuple(selected_products_with_support),
+            st.session_state.warehouse_native_experimentation,
+            st.session_state.support_tier,
         )
         if product_signature != st.session_state.product_signature:
             st.session_state.services_rows = build_services_rows(
@@ -1723,81 +2398,74 @@ def main() -> None:
             "The contract total and excess usage rate will be auto calculated. "
             "(rendering is slighly slow when updating the numbers, please be patient)"
         )
-        column_spec = table_columns_for_warehouse(st.session_state.warehouse_type)
         input_column_spec = [
             (key, label) for key, label in column_spec if key != "subscription_period"
         ]
-        rows_for_editor = normalize_service_rows(st.session_state.services_rows)
-        for row in rows_for_editor:
-            row["annual_service_fee"] = format_fee_display(row.get("annual_service_fee", 0.0))
+        # Normalizing and reformatting every fee cell is wasted work on
+        # reruns that didn't touch the table; key it on the rows' content.
+        svc_hash = hash(_services_key(st.session_state.services_rows))
+        if svc_hash == st.session_state.get("_rows_for_editor_hash"):
+            rows_for_editor = st.session_state._rows_for_editor
+        else:
+            rows_for_editor = normalize_service_rows(st.session_state.services_rows)
+            for row in rows_for_editor:
+                row["annual_service_fee"] = format_fee_display(row.get("annual_service_fee", 0.0))
+            st.session_state._rows_for_editor_hash = svc_hash
+            st.session_state._rows_for_editor = rows_for_editor
 
         edited_services = st.data_editor(
             rows_for_editor,
             num_rows="fixed",
             use_container_width=True,
             column_order=[key for key, _ in input_column_spec],
-            column_config={
-                key: (
-                    st.column_config.TextColumn(label, disabled=True)
-                    if key == "subscription_period"
-                    else st.column_config.TextColumn(
-                        label, help="Use whole numbers for experimentation; other rows are N/A."
-                    )
-                    if key == "annual_usage_commitment"
-                    else st.column_config.TextColumn(label)
-                    if key == "annual_service_fee"
-                    else label
-                )
-                for key, label in input_column_spec
-            },
+            column_config=_column_config_for(warehouse_type),
             key="services_editor",
         )
         services_df = rows_from_editor(edited_services)
         # Subscription period/term is derived from terms and must stay locked.
+        start_dt = parse_date(order.start_date)
         period_text_for_rows = (
-            f"{display_date(parse_date(order.start_date))} - "
-            f"{display_date(compute_end_date(parse_date(order.start_date), order.subscription_term_months))}"
+            f"{display_date(start_dt)} - "
+            f"{display_date(compute_end_date(start_dt, order.subscription_term_months))}"
         )
+        # rows_from_editor already normalized the fee floats and usage
+        # commitments, so the only per-row work left is stamping the derived
+        # period and masking non-experimentation commitments.
+        is_credit = warehouse_type == "Credit/Usage Based"
         for row in services_df:
             row["subscription_period"] = period_text_for_rows
-            service_name = str(row.get("service", "")).strip()
-            if st.session_state.warehouse_type != "Credit/Usage Based" and not is_experimentation_service(
-                service_name, st.session_state.warehouse_type
+            if not is_credit and not is_experimentation_service(
+                str(row.get("service", "")).strip(), warehouse_type
             ):
                 row["annual_usage_commitment"] = "N/A"
-            else:
-                row["annual_usage_commitment"] = format_usage_commitment_value(
-                    row.get("annual_usage_commitment", "")
-                )
-            row["annual_service_fee"] = normalize_fee_value(row.get("annual_service_fee", 0.0))
-        sorted_services_df = sort_rows_by_fee_desc(services_df)
-        current_order_sig = [
-            (
-                str(row.get("service", "")),
-                str(row.get("annual_usage_commitment", "")),
-                str(row.get("unit", "")),
-                str(row.get("annual_service_fee", "")),
-            )
-            for row in services_df
-        ]
-        sorted_order_sig = [
-            (
-                str(row.get("service", "")),
-                str(row.get("annual_usage_commitment", "")),
-                str(row.get("unit", "")),
-                str(row.get("annual_service_fee", "")),
-            )
-            for row in sorted_services_df
-        ]
+        sorted_services_df, order_changed = sort_rows_by_fee_desc(services_df)
         st.session_state.services_rows = sorted_services_df
-        if current_order_sig != sorted_order_sig:
-            st.rerun()
+        # A sort reorder only needs the editor repainted; defer the rerun so
+        # it coalesces with any navigation/validation rerun below.
+        need_rerun = order_changed
         services_df = sorted_services_df
-        st.session_state.order_data = asdict(order)
-        contract_total = sum(safe_money(str(row.get("annual_service_fee", ""))) for row in services_df)
-        excess_usage_rate = compute_excess_usage_rate(
-            services_df, st.session_state.warehouse_type
-        )
+        persist_order(order)
+        # Total, excess rate and validation only change with the table
+        # content; reuse the previous rerun's results when it is untouched.
+        summary_key = (product_signature, hash(_services_key(services_df)))
+        if st.session_state.get("_services_summary_key") == summary_key:
+            contract_total, excess_usage_rate, service_validation_errors = (
+                st.session_state._services_summary
+            )
+        else:
+            # Rows are normalized, so the fee is already a parsed float;
+            # fsum accumulates at C level without rounding drift.
+            contract_total = math.fsum(
+                row.get("annual_service_fee", 0.0) for row in services_df
+            )
+            excess_usage_rate = compute_excess_usage_rate(services_df, warehouse_type)
+            service_validation_errors = validate_services_rows(services_df, warehouse_type)
+            st.session_state._services_summary_key = summary_key
+            st.session_state._services_summary = (
+                contract_total,
+                excess_usage_rate,
+                service_validation_errors,
+            )
         st.markdown(
             f"""
             <div style='text-align: right; margin-top: 8px;'>
@@ -1807,10 +2475,6 @@ def main() -> None:
             """,
             unsafe_allow_html=True,
         )
-
-        service_validation_errors = validate_services_rows(
-            services_df, st.session_state.warehouse_type
-        )
         if st.session_state.show_table_errors and service_validation_errors:
             for err in service_validation_errors:
                 st.error(err)
@@ -1819,8 +2483,8 @@ def main() -> None:
         with nav1:
             if st.button("Back to Terms"):
                 st.session_state.form_step = 2
-                st.session_state.order_data = asdict(order)
-                st.rerun()
+                persist_order(order)
+                need_rerun = True
         with nav2:
             can_continue = len(selected_products_with_support) > 0
             if not can_continue:
@@ -1833,155 +2497,20 @@ def main() -> None:
             if clicked_continue:
                 if service_validation_errors:
                     st.session_state.show_table_errors = True
-                    st.rerun()
+                    need_rerun = True
                 else:
                     st.session_state.show_table_errors = False
-                    st.session_state.order_data = asdict(order)
+                    persist_order(order)
                     st.session_state.form_step = 4
-                    st.rerun()
+                    need_rerun = True
+        if need_rerun:
+            st.rerun()
 
     else:
         st.subheader("Agreement")
-        services_df = normalize_service_rows(st.session_state.services_rows)
-        selected_products_with_support = [
-            p for p in st.session_state.selected_products if p != "Support"
-        ] + ["Support"]
-        excess_usage_rate = compute_excess_usage_rate(
-            services_df, st.session_state.warehouse_type
-        )
-        column_spec = table_columns_for_warehouse(st.session_state.warehouse_type)
-        total = sum(safe_money(str(row.get("annual_service_fee", ""))) for row in services_df)
-        computed_end_date = display_date(
-            compute_end_date(parse_date(order.start_date), order.subscription_term_months)
-        )
-        terms_options = ["Online", "MSA"]
-        order.terms_type = st.radio(
-            "Terms",
-            terms_options,
-            index=terms_options.index(order.terms_type)
-            if order.terms_type in terms_options
-            else 0,
-            horizontal=True,
-        )
-        if order.terms_type == "MSA":
-            msa_default = parse_date(order.msa_execution_date) if order.msa_execution_date else None
-            selected_msa_date = st.date_input(
-                "MSA Execution Date",
-                value=msa_default,
-                format="MM/DD/YYYY",
-            )
-            order.msa_execution_date = (
-                display_date(selected_msa_date) if selected_msa_date is not None else ""
-            )
-        else:
-            order.msa_execution_date = ""
-
-        special_term_options = [
-            "price cap",
-            "no auto-renewal",
-            "no logo rights",
-            "one time discount",
-        ]
-        order.special_terms = normalize_special_terms(
-            st.multiselect(
-                "Legal: Special Terms",
-                options=special_term_options,
-                default=[t for t in order.special_terms if t in special_term_options],
-                placeholder="None",
-            )
-        )
-        usage_terms_by_products = build_usage_terms_for_products(
-            st.session_state.warehouse_type,
-            selected_products_with_support,
-            excess_usage_rate,
-        )
-        if usage_terms_by_products:
-            order.usage_terms = usage_terms_by_products
-        else:
-            order.usage_terms = ", ".join(order.special_terms) if order.special_terms else "None"
-
-        today_date = date.today()
-        order.expiration_enabled = st.checkbox(
-            "Include Expiration Date",
-            value=bool(order.expiration_enabled or order.expiration_date),
-        )
-        if order.expiration_enabled:
-            expiration_default = parse_date(order.expiration_date) if order.expiration_date else None
-            if expiration_default is not None and expiration_default < today_date:
-                expiration_default = today_date
-            selected_expiration = st.date_input(
-                "Expiration Date",
-                value=expiration_default,
-                format="MM/DD/YYYY",
-                help="Required when enabled",
-            )
-            if selected_expiration is not None and selected_expiration < today_date:
-                st.error("Expiration Date must be today or later.")
-                order.expiration_date = display_date(today_date)
-            else:
-                order.expiration_date = (
-                    display_date(selected_expiration) if selected_expiration is not None else ""
-                )
-        else:
-            order.expiration_date = ""
-
-        st.markdown("**Document Preview**")
-        preview_pdf = create_branded_pdf(
-            order,
-            services_df,
-            st.session_state.warehouse_type,
-        )
-        preview_b64 = base64.b64encode(preview_pdf).decode("utf-8")
-        components.html(
-            f"""
-            <iframe
-              src="data:application/pdf;base64,{preview_b64}"
-              width="100%"
-              height="700px"
-              style="border: 1px solid #ddd; border-radius: 8px;"
-            ></iframe>
-            """,
-            height=720,
-        )
-        st.subheader("Preview Data")
-        st.json(
-            {
-                **asdict(order),
-                "computed_subscription_end_date": computed_end_date,
-                "warehouse_type": st.session_state.warehouse_type,
-                "selected_products": selected_products_with_support,
-                "support_tier": st.session_state.support_tier,
-                "columns": [label for _, label in column_spec],
-                "services": services_df,
-                "calculated_total": fmt_money(total),
-                "terms_type": order.terms_type,
-            }
-        )
-
-        nav1, nav2 = st.columns(2)
-        with nav1:
-            if st.button("Back to Product Selection"):
-                st.session_state.form_step = 3
-                st.session_state.order_data = asdict(order)
-                st.rerun()
-        with nav2:
-            if st.button("Generate PDF", type="primary"):
-                if order.terms_type == "MSA" and not order.msa_execution_date:
-                    st.error("MSA Execution Date is required when Terms is MSA.")
-                    st.stop()
-                if order.expiration_enabled and not order.expiration_date:
-                    st.error("Expiration Date is required when enabled.")
-                    st.stop()
-                st.session_state.order_data = asdict(order)
-                pdf_bytes = create_branded_pdf(order, services_df, st.session_state.warehouse_type)
-                output_filename = build_output_filename(order.account_name)
-                st.success("Branded PDF generated.")
-                st.download_button(
-                    "Download PDF",
-                    data=pdf_bytes,
-                    file_name=output_filename,
-                    mime="application/pdf",
-                )
+        _legal_terms_fragment()
+        _preview_fragment()
+        _nav_fragment()
 
 
 if __name__ == "__main__":